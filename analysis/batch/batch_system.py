@@ -67,7 +67,10 @@ echo "------------------------------------------------------------------------"
 """
     DIRECTIVES = {}
     JOBID_FORMAT = ''
+    ARRAY_JOBID_FORMAT = ''
     JOBID_VARIABLE = ''
+    ARRAY_JOBID_VARIABLE = ''
+    ARRAY_INDEX_VARIABLE = ''
 
     def __init__(self):
         """Check that it has been properly subclassed."""
@@ -99,12 +102,86 @@ echo "------------------------------------------------------------------------"
         Return:
             str: Job ID
 
+        """
+        return self.submit_rendered(self.render_job(job_name, script, log_file,
+                                                    extra_config=extra_config,
+                                                    **batch_config))
+
+    def render_job(self, job_name, script, log_file, extra_config=None, **batch_config):
+        """Build the full script of a job without submitting it.
+
+        The output can be submitted several times with `submit_rendered`, which avoids
+        rebuilding it when sending many identical jobs.
+
+        Arguments:
+            job_name (str): Job name.
+            script (str): Commands to run.
+            log_file (str): Logfile location.
+            extra_config (dict, optional): Extra configuration for 'script'. Defaults
+                to `None`.
+            **batch_config (dict): Configuration of the batch system.
+
+        Return:
+            str: Job script, including the batch system header.
+
+        """
+        header = self._get_header(job_name, log_file, self.JOBID_FORMAT, batch_config)
+        return self._render(script, header, extra_config, batch_config)
+
+    # pylint: disable=too-many-arguments
+    def submit_array_job(self, job_name, script, log_file, array_size,
+                         extra_config=None, **batch_config):
+        """Submit an array of identical jobs to the batch system in one go.
+
+        Each job of the array gets its own log file. In the script, `array_jobid_var`
+        holds the job ID of the array (for Torque, including the array index, which needs
+        to be stripped) and `array_index_var` the index of the job in the array, starting at 1.
+
+        Arguments:
+            job_name (str): Job name.
+            script (str): Commands to run.
+            log_file (str): Logfile location.
+            array_size (int): Number of jobs in the array.
+            extra_config (dict, optional): Extra configuration for 'script'. Defaults
+                to `None`.
+            **batch_config (dict): Configuration of the batch system.
+
+        Return:
+            str: Job ID of the array.
+
+        Raise:
+            NotImplementedError: If the batch system doesn't support array jobs.
+
+        """
+        if not (self.ARRAY_JOBID_FORMAT and self.ARRAY_JOBID_VARIABLE and
+                self.ARRAY_INDEX_VARIABLE and 'array' in self.DIRECTIVES):
+            raise NotImplementedError("Array jobs are not supported by the {} batch system".format(
+                self.__class__.__name__))
+        header = self._get_header(job_name, log_file, self.ARRAY_JOBID_FORMAT, batch_config)
+        header.append(self.DIRECTIVES['array'].format(array_size))
+        return self.submit_rendered(self._render(script, header, extra_config, batch_config))
+
+    def _get_header(self, job_name, log_file, jobid_format, batch_config):
+        """Build the batch system header of a job script.
+
+        Note:
+            The used batch configuration keys are removed from `batch_config`.
+
+        Arguments:
+            job_name (str): Job name.
+            log_file (str): Logfile location.
+            jobid_format (str): Job ID placeholder to add to the log files.
+            batch_config (dict): Configuration of the batch system.
+
+        Return:
+            list: Header lines.
+
         """
         err_file = batch_config.pop('errfile', log_file)
         log_file, ext = os.path.splitext(log_file)
-        log_file = '{}{}{}'.format(log_file, self.JOBID_FORMAT, ext)
+        log_file = '{}{}{}'.format(log_file, jobid_format, ext)
         err_file, ext = os.path.splitext(err_file)
-        err_file = '{}{}{}'.format(err_file, self.JOBID_FORMAT, ext)
+        err_file = '{}{}{}'.format(err_file, jobid_format, ext)
         # Build header
         header = [self.DIRECTIVES['job-name'].format(job_name),
                   self.DIRECTIVES['logfile'].format(log_file),
@@ -118,18 +195,77 @@ echo "------------------------------------------------------------------------"
                 logger.warning("Ignoring directive %s -> %s", batch_option, batch_value)
                 continue
             header.append(directive.format(batch_value))
+        return header
+
+    def _render(self, script, header, extra_config, batch_config):
+        """Fill the job script.
+
+        Arguments:
+            script (str): Commands to run.
+            header (list): Batch system header lines.
+            extra_config (dict): Extra configuration for 'script'. Can be `None`.
+            batch_config (dict): Configuration of the batch system.
+
+        Return:
+            str: Job script.
+
+        """
         script_config = extra_config if extra_config is not None else {}
         script_config['workdir'] = script_config.get('workdir', os.getcwd())
         script_config['header'] = '\n'.join(header)
         script_config['shell'] = batch_config.pop('shell', '/bin/bash')
         script_config['jobid_var'] = self.JOBID_VARIABLE
+        script_config['array_jobid_var'] = self.ARRAY_JOBID_VARIABLE
+        script_config['array_index_var'] = self.ARRAY_INDEX_VARIABLE
+        return script.format(**script_config)
+
+    def submit_rendered(self, rendered_script):
+        """Submit an already built job script to the batch system.
+
+        The submission script is input as stdin.
+
+        Arguments:
+            rendered_script (str): Job script, as given by `render_job` or `render_script`.
+
+        Return:
+            str: Job ID
+
+        """
         # Submit using stdin
         logger.debug('Submitting job')
-        #  logger.debug(script.format(**script_config))
+        #  logger.debug(rendered_script)
         proc = subprocess.Popen(self.SUBMIT_COMMAND,
                                 stdout=subprocess.PIPE,
                                 stdin=subprocess.PIPE)
-        stdout, stderr = proc.communicate(input=script.format(**script_config))
+        stdout, stderr = proc.communicate(input=rendered_script)
+        return stdout.rstrip('\n')
+
+    def submit_file(self, script_file):
+        """Submit a job script stored in a file to the batch system.
+
+        The batch system copies the script on submission, so the same file can be
+        used to submit many jobs and removed afterwards.
+
+        Arguments:
+            script_file (str): Path to the job script, for example as given by
+                `render_job` or `render_script`.
+
+        Return:
+            str: Job ID
+
+        Raise:
+            RuntimeError: If the submission command fails.
+
+        """
+        logger.debug('Submitting job from file -> %s', script_file)
+        proc = subprocess.Popen([self.SUBMIT_COMMAND, script_file],
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE,
+                                universal_newlines=True)
+        stdout, stderr = proc.communicate()
+        if proc.returncode:
+            raise RuntimeError("Error submitting job (exit status {}) -> {}".format(
+                proc.returncode, stderr.strip() or stdout.strip()))
         return stdout.rstrip('\n')
 
     # pylint: disable=too-many-arguments
@@ -150,11 +286,35 @@ echo "------------------------------------------------------------------------"
         Return:
             str: JobID.
 
+        """
+        return self.submit_rendered(self.render_script(job_name, cmd_script, script_args,
+                                                       log_file, executable=executable,
+                                                       **batch_config))
+
+    # pylint: disable=too-many-arguments
+    def render_script(self, job_name, cmd_script, script_args,
+                      log_file, executable='python', **batch_config):
+        """Build the job script to run a script without submitting it.
+
+        See `submit_script` and `render_job`.
+
+        Arguments:
+            job_name (str): Job name.
+            cmd_script (str): Script to run.
+            script_args (list): List of arguments passed to the script.
+            log_file (str): Logfile location.
+            executable (str, optional): Command to execute the script. Defaults to 'python'.
+            **batch_config (dict): Configuration of the batch system.
+
+        Return:
+            str: Job script, including the batch system header.
+
         """
         cmd = '{} {} {}'.format(executable + ' ' if executable else './',
                                 cmd_script,
                                 ' '.join(script_args))
-        return self.submit_job(job_name, self.DEFAULT_SCRIPT, log_file, extra_config={'script': cmd}, **batch_config)
+        return self.render_job(job_name, self.DEFAULT_SCRIPT, log_file,
+                               extra_config={'script': cmd}, **batch_config)
 
     def get_job_id(self):
         """Get the Job ID.
@@ -177,9 +337,13 @@ class Torque(BatchSystem):
                   'errfile': '#PBS -e {}',
                   'mergelogs': '#PBS -j oe',
                   'runtime': '#PBS -l cput={0}\n#PBS -l walltime={0}',
-                  'memory': '#PBS -l mem={}'}
+                  'memory': '#PBS -l mem={}',
+                  'array': '#PBS -t 1-{}'}
     JOBID_FORMAT = '_${PBS_JOBID}'
+    ARRAY_JOBID_FORMAT = '_${PBS_JOBID}'  # Includes the array index
     JOBID_VARIABLE = 'PBS_JOBID'
+    ARRAY_JOBID_VARIABLE = 'PBS_JOBID'  # Includes the array index
+    ARRAY_INDEX_VARIABLE = 'PBS_ARRAYID'
 
 
 class Slurm(BatchSystem):
@@ -193,9 +357,13 @@ class Slurm(BatchSystem):
                   'runtime': '#SBATCH -t {}',
                   'memory': '#SBATCH --mem={}',
                   'memory-per-cpu': '#SBATCH --mem-per-cpu={}',
-                  'queue': '#SBATCH --partition={}'}
+                  'queue': '#SBATCH --partition={}',
+                  'array': '#SBATCH --array=1-{}'}
     JOBID_FORMAT = '_%j'
+    ARRAY_JOBID_FORMAT = '_%A_%a'
     JOBID_VARIABLE = 'SLURM_JOB_ID'
+    ARRAY_JOBID_VARIABLE = 'SLURM_ARRAY_JOB_ID'
+    ARRAY_INDEX_VARIABLE = 'SLURM_ARRAY_TASK_ID'
 
 
 BATCH_SYSTEMS = OrderedDict((('slurm', Slurm()),
@@ -11,8 +11,6 @@ from __future__ import print_function, division, absolute_import
 import argparse
 import os
 
-import matplotlib.pyplot as plt
-
 import analysis.utils.config as _config
 import analysis.utils.paths as _paths
 from analysis import get_global_var
@@ -82,11 +80,12 @@ def run(config_files, link_from):
     efficiency_class = get_efficiency_model_class(config['model'])
     if not efficiency_class:
         raise ValueError("Unknown efficiency model -> {}".format(config['model']))
+    eff_path = _paths.get_efficiency_path(config['name'])  # pylint: disable=E1101
+    eff_exists = os.path.exists(eff_path)
+    plot_files_exist = all(os.path.exists(file_name)
+                           for file_name in plot_files.values())
     # Let's do it
-    # pylint: disable=E1101
-    if not all(os.path.exists(file_name)
-               for file_name in plot_files.values()) or \
-            not os.path.exists(_paths.get_efficiency_path(config['name'])):  # If plots don't exist, we load data
+    if not plot_files_exist or not eff_exists:  # If plots don't exist, we load data
         logger.info("Loading data, this may take a while...")
         weight_var = config['data'].get('weight-var-name', None)
         # Prepare data
@@ -100,7 +99,7 @@ def run(config_files, link_from):
         else:
             logger.info("Data loaded, not using any weights")
 
-        if not os.path.exists(_paths.get_efficiency_path(config['name'])):
+        if not eff_exists:
             logger.info("Fitting efficiency model")
             try:
                 eff = efficiency_class.fit(input_data, config['variables'], weight_var, **config['parameters'])
@@ -116,6 +115,7 @@ def run(config_files, link_from):
             logger.warning("Output efficiency already exists, only redoing plots")
             eff = load_efficiency_model(config['name'])
         if plot_files:
+            import matplotlib.pyplot as plt
             import seaborn as sns
             sns.set_style("white")
             plt.style.use('file://{}'.format(os.path.join(get_global_var('STYLE_PATH'),
@@ -126,8 +126,7 @@ def run(config_files, link_from):
                             var_name, plot_files[var_name])
                 plot.savefig(plot_files[var_name], bbox_inches='tight')
     else:
-        logger.info("Efficiency file exists: %s. Nothing to do!",
-                    _paths.get_efficiency_path(config['name']))
+        logger.info("Efficiency file exists: %s. Nothing to do!", eff_path)
 
 
 def main():
@@ -46,9 +46,23 @@ def register_fit_strategy(name, fit_function):
     return len(get_global_var('FIT_STRATEGIES'))
 
 
+def _simple_fit(model, dataset, fit_config):
+    """Perform a single `fitTo` call.
+
+    The `RooCmdArg` are passed to RooFit in a `RooLinkedList`, which avoids the
+    limit on the number of positional arguments of `fitTo`.
+
+    """
+    import ROOT
+
+    cmd_list = ROOT.RooLinkedList()
+    for cmd in fit_config:
+        cmd_list.Add(cmd)
+    return model.fitTo(dataset, cmd_list)
+
+
 # Register simple fit strategy
-register_fit_strategy('simple',
-                      lambda model, dataset, fit_config: model.fitTo(dataset, *fit_config))
+register_fit_strategy('simple', _simple_fit)
 
 
 # Get the fit strategy
@@ -112,17 +126,18 @@ def fit(factory, pdf_name, strategy, dataset, verbose=False, **kwargs):
     except KeyError:
         raise KeyError("Unknown fit strategy -> {}".format(strategy))
     print('\n\n\n\n\n{}\n\n\n\n\n'.format(fit_config))
+    is_extended = factory.is_extended()
     try:
         model = factory.get_extended_pdf(pdf_name, pdf_name) \
-            if factory.is_extended() \
+            if is_extended \
             else factory.get_pdf(pdf_name, pdf_name)
     except ValueError as error:
         logger.error("Problem getting the PDF -> %s", error)
         raise
-    if kwargs.get('Extended', False) != factory.is_extended():
+    if kwargs.get('Extended', False) != is_extended:
         logger.warning("Requested fit with Extended=%s fit on %s extended PDF. Check this is what you want.",
                        kwargs.get('Extended', False),
-                       'an ' if factory.is_extended() else 'a non-')
+                       'an ' if is_extended else 'a non-')
     return fit_func(model, dataset, fit_config)
 
 # EOF
@@ -8,18 +8,31 @@
 """Analyze and store fit results."""
 from __future__ import print_function, division, absolute_import
 
+import base64
 import copy
+import json
+import multiprocessing
+import os
+import threading
 from collections import OrderedDict
+from itertools import chain
 
 import numpy as np
+import pandas as pd
 
-# from analysis.utils.decorators import memoize
 import analysis.utils.paths as _paths
 from analysis.utils.config import load_config, write_config
-from analysis.utils.exceptions import NotInitializedError, ConfigError
-from analysis.utils.root import iterate_roocollection
+from analysis.utils.exceptions import NotInitializedError
+from analysis.utils.random_numbers import factorize_covariance, multivariate_normal
+from analysis.utils.root import get_roorealvar_values
 
 _SUFFIXES = ('', '_err_hesse', '_err_minus', '_err_plus')
+# Key used to store the covariance matrix as base64-encoded little-endian doubles
+_BINARY_MATRIX_KEY = 'base64-float64'
+# Keys needed to build a FitResult from YAML
+_REQUIRED_YAML_KEYS = frozenset(('fit-parameters', 'fit-parameters-initial',
+                                 'covariance-matrix', 'status'))
+_REQUIRED_COV_MATRIX_KEYS = frozenset(('quality', 'matrix'))
 
 # Minuit covariance codes
 COV_CODES = {-1: "Not available (inversion failed or Hesse failed)",
@@ -46,13 +59,160 @@ STATUS = {'MINIMIZE': {0: "Converged",
                     5: "Other failure"}}
 
 
+# Cache of loaded fit result files, indexed by (path, modification time, size)
+_YAML_CACHE = OrderedDict()
+_YAML_CACHE_SIZE = 128
+_YAML_CACHE_LOCK = threading.Lock()
+# Number of covariance sub-matrices (and of their factorizations) cached per fit result
+_COV_MATRIX_CACHE_SIZE = 64
+# Plain column names, shared between the fit results of the same model
+_PLAIN_COLUMNS_CACHE = {}
+
+
+def _get_json_cache_path(file_name):
+    """Get the path of the JSON cache of a fit result YAML file."""
+    return file_name + '.json'
+
+
+def _get_file_signature(file_name):
+    """Get the modification time and the size of a file, used to detect changes.
+
+    Arguments:
+        file_name (str): File to check.
+
+    Return:
+        tuple: Modification time (in ns, if available) and size of the file.
+
+    Raise:
+        OSError: If the file cannot be found.
+
+    """
+    file_stat = os.stat(file_name)
+    return getattr(file_stat, 'st_mtime_ns', file_stat.st_mtime), file_stat.st_size
+
+
+def _load_json_cache(json_file_name, signature):
+    """Load the JSON cache of a fit result file, if it is up to date.
+
+    Arguments:
+        json_file_name (str): JSON cache file.
+        signature (tuple): Signature of the YAML file, as given by `_get_file_signature`.
+
+    Return:
+        dict: Fit result information. `None` if there is no cache or if it was written
+            for a different version of the YAML file.
+
+    """
+    if not os.path.exists(json_file_name):
+        return None
+    try:
+        with open(json_file_name) as json_file:
+            json_cache = json.load(json_file, object_pairs_hook=OrderedDict)
+    except ValueError:  # Corrupted cache, ignore it
+        return None
+    if not isinstance(json_cache, dict) or json_cache.get('yaml-signature') != list(signature):
+        return None
+    return json_cache.get('fit-result')
+
+
+def _check_fit_result_keys(fit_result_config):
+    """Check that the fit result information contains all the required keys.
+
+    Arguments:
+        fit_result_config (dict): Fit result information.
+
+    Raise:
+        KeyError: If any of the FitResult data is missing.
+
+    """
+    missing_keys = sorted(_REQUIRED_YAML_KEYS.difference(fit_result_config))
+    cov_matrix = fit_result_config.get('covariance-matrix')
+    if isinstance(cov_matrix, dict):
+        missing_keys.extend('covariance-matrix/{}'.format(key)
+                            for key in sorted(_REQUIRED_COV_MATRIX_KEYS.difference(cov_matrix)))
+    if missing_keys:
+        raise KeyError("Missing keys in YAML input -> {}".format(', '.join(missing_keys)))
+
+
+def _add_to_lru_cache(cache, key, value, max_size):
+    """Add an entry to a least recently used cache.
+
+    The oldest entries are dropped when the cache grows beyond `max_size`.
+
+    Arguments:
+        cache (OrderedDict): Cache, ordered from least to most recently used.
+        key (hashable): Key of the entry.
+        value (object): Value of the entry.
+        max_size (int): Maximum number of entries.
+
+    """
+    cache[key] = value
+    while len(cache) > max_size:
+        cache.popitem(last=False)
+
+
+def _get_plain_columns(param_names):
+    """Get the plain column names of the given fit parameters.
+
+    The names are built only once for each set of parameters, so fit results of
+    the same model share the same list.
+
+    Arguments:
+        param_names (tuple[str]): Names of the fit parameters.
+
+    Return:
+        list: Parameter names with each of the `_SUFFIXES` appended. It is shared,
+            so it must not be modified.
+
+    """
+    columns = _PLAIN_COLUMNS_CACHE.get(param_names)
+    if columns is None:
+        columns = list(chain.from_iterable((name + suffix for suffix in _SUFFIXES)
+                                           for name in param_names))
+        _PLAIN_COLUMNS_CACHE[param_names] = columns
+    return columns
+
+
+def _load_fit_result_file(file_name):
+    """Load a fit result YAML file, caching its contents.
+
+    The cache is invalidated when the modification time or the size of the file
+    change. A copy of the cached information is returned, so it can be freely modified.
+    If a JSON cache file (see `FitResult.to_yaml_file`) written for the current
+    version of the YAML file exists, it is loaded instead.
+
+    Arguments:
+        file_name (str): File to load.
+
+    Return:
+        dict: Fit result information.
+
+    Raise:
+        OSError: If the file cannot be found.
+        KeyError: If any of the FitResult data is missing from the input file.
+
+    """
+    signature = _get_file_signature(file_name)
+    key = (os.path.abspath(file_name),) + signature
+    with _YAML_CACHE_LOCK:
+        if key in _YAML_CACHE:
+            _YAML_CACHE[key] = _YAML_CACHE.pop(key)  # Mark as most recently used
+            return copy.deepcopy(_YAML_CACHE[key])
+    fit_result_config = _load_json_cache(_get_json_cache_path(file_name), signature)
+    if fit_result_config is None:
+        fit_result_config = load_config(file_name)
+    _check_fit_result_keys(fit_result_config)
+    with _YAML_CACHE_LOCK:
+        _add_to_lru_cache(_YAML_CACHE, key, fit_result_config, _YAML_CACHE_SIZE)
+    return copy.deepcopy(fit_result_config)
+
+
 def ensure_initialized(method):
     """Make sure the fit result is initialized."""
 
     def wrapper(self, *args, **kwargs):
         """Check result is empty. Raise otherwise."""
-        if not self.get_result():
-            raise NotInitializedError("Trying to export a non-initialized fit result")
+        self._check()
         return method(self, *args, **kwargs)
 
     return wrapper
@@ -66,6 +226,14 @@ class FitResult(object):
 
     """
 
+    __slots__ = ('_result',
+                 '_fit_parameter_table',
+                 '_param_index',
+                 '_sampling_cache',
+                 '_converged',
+                 '_cov_matrix_cache',
+                 '_yaml_cache')
+
     def __init__(self, result=None):
         """Initialize internal variables.
 
@@ -81,6 +249,22 @@ class FitResult(object):
         if result and 'const-parameters' not in result:
             result['const-parameters'] = OrderedDict()
         self._result = result
+        self._fit_parameter_table = None
+        self._param_index = None
+        self._sampling_cache = OrderedDict()
+        self._converged = None
+        self._cov_matrix_cache = OrderedDict()
+        self._yaml_cache = {}
+
+    def _check(self):
+        """Make sure the fit result is initialized.
+
+        Raise:
+            NotInitializedError: If the fit result has not been initialized.
+
+        """
+        if not self._result:
+            raise NotInitializedError("Trying to export a non-initialized fit result")
 
     def get_result(self):
         """Get the full fit result information.
@@ -92,12 +276,14 @@ class FitResult(object):
         return self._result
 
     @staticmethod
-    # @memoize
-    def from_roofit(roofit_result):
+    def from_roofit(roofit_result, cov_dtype=np.float64):
         """Load the `RooFitResult` into the internal format.
 
         Arguments:
             roofit_result (`ROOT.RooFitResult`): Fit result.
+            cov_dtype (`numpy.dtype`, optional): Type used to store the covariance matrix.
+                `numpy.float32` halves the memory used by large fits. Random sampling
+                is always done in double precision. Defaults to `numpy.float64`.
 
         Return:
             FitResult
@@ -105,24 +291,24 @@ class FitResult(object):
         """
         result = {}
         # Fit parameters
-        result['const-parameters'] = OrderedDict((fit_par.GetName(), fit_par.getVal())
-                                                 for fit_par
-                                                 in iterate_roocollection(roofit_result.constPars()))
-        result['fit-parameters'] = OrderedDict((fit_par.GetName(), (fit_par.getVal(),
-                                                                    fit_par.getError(),
-                                                                    fit_par.getErrorLo(),
-                                                                    fit_par.getErrorHi()))
-                                               for fit_par
-                                               in iterate_roocollection(roofit_result.floatParsFinal()))
-        result['fit-parameters-initial'] = OrderedDict((fit_par.GetName(), fit_par.getVal())
-                                                       for fit_par
-                                                       in iterate_roocollection(roofit_result.floatParsInit()))
+        names, values = get_roorealvar_values(roofit_result.constPars())
+        result['const-parameters'] = OrderedDict(zip(names, values[:, 0].tolist()))
+        names, values = get_roorealvar_values(roofit_result.floatParsFinal())
+        result['fit-parameters'] = OrderedDict(zip(names, map(tuple, values.tolist())))
+        names, values = get_roorealvar_values(roofit_result.floatParsInit())
+        result['fit-parameters-initial'] = OrderedDict(zip(names, values[:, 0].tolist()))
         # Covariance matrix
+        # Copy the TMatrixD buffer in one go instead of accessing element by element
         covariance_matrix = roofit_result.covarianceMatrix()
+        n_rows, n_cols = covariance_matrix.GetNrows(), covariance_matrix.GetNcols()
+        if n_rows * n_cols:
+            matrix = np.frombuffer(covariance_matrix.GetMatrixArray(),
+                                   dtype=np.float64,
+                                   count=n_rows * n_cols).reshape(n_rows, n_cols).copy()
+        else:
+            matrix = np.empty((n_rows, n_cols), dtype=np.float64)
         cov_matrix = {'quality': roofit_result.covQual(),
-                      'matrix': np.matrix([[covariance_matrix[row][col]
-                                            for col in range(covariance_matrix.GetNcols())]
-                                           for row in range(covariance_matrix.GetNrows())])}
+                      'matrix': matrix.astype(cov_dtype, copy=False)}
         result['covariance-matrix'] = cov_matrix
         # Status
         result['status'] = OrderedDict((roofit_result.statusLabelHistory(cycle), roofit_result.statusCodeHistory(cycle))
@@ -132,42 +318,52 @@ class FitResult(object):
         return FitResult(result)
 
     @staticmethod
-    # @memoize
-    def from_yaml(yaml_dict):
+    def from_yaml(yaml_dict, cov_dtype=np.float64):
         """Initialize from a YAML dictionary.
 
         Arguments:
             yaml_dict (dict, OrderedDict): YAML information to load.
+            cov_dtype (`numpy.dtype`, optional): Type used to store the covariance matrix.
+                See `from_roofit`. Defaults to `numpy.float64`.
 
         Return:
             FitResult
 
         Raise:
             KeyError: If any of the FitResult data is missing from the YAML dictionary.
+            ValueError: If the covariance matrix doesn't match the fit parameters.
 
         """
-        if not set(yaml_dict.keys()).issuperset({'fit-parameters',
-                                                 'fit-parameters-initial',
-                                                 'covariance-matrix',
-                                                 'status'}):
-            raise KeyError("Missing keys in YAML input")
-        if not set(yaml_dict['covariance-matrix'].keys()).issuperset({'quality', 'matrix'}):
-            raise KeyError("Missing keys in covariance matrix in YAML input")
+        _check_fit_result_keys(yaml_dict)
         # Build matrix
-        yaml_dict['covariance-matrix']['matrix'] = np.asmatrix(
-            np.array(yaml_dict['covariance-matrix']['matrix']).reshape(len(yaml_dict['fit-parameters']),
-                                                                       len(yaml_dict['fit-parameters'])))
-        return FitResult(yaml_dict)
+        n_pars = len(yaml_dict['fit-parameters'])
+        matrix = yaml_dict['covariance-matrix']['matrix']
+        if isinstance(matrix, dict):
+            matrix = np.frombuffer(bytearray(base64.b64decode(matrix[_BINARY_MATRIX_KEY])),
+                                   dtype='<f8')
+        else:
+            matrix = np.asarray(matrix, dtype=np.float64)
+        if matrix.size != n_pars * n_pars:
+            raise ValueError("Covariance matrix size doesn't match the number of fit parameters")
+        # Don't modify the input, it may be shared (see to_yaml)
+        result = copy.copy(yaml_dict)
+        matrix = matrix.reshape(n_pars, n_pars).astype(cov_dtype, copy=False)
+        result['covariance-matrix'] = {'quality': yaml_dict['covariance-matrix']['quality'],
+                                       'matrix': matrix}
+        return FitResult(result)
 
     @staticmethod
-    # @memoize
-    def from_yaml_file(name):
+    def from_yaml_file(name, cov_dtype=np.float64):
         """Initialize from a YAML file.
 
-        File name is determined by get_fit_result_path.
+        File name is determined by get_fit_result_path. Parsed files are cached
+        until they are modified on disk. Parsing uses the libyaml C loader if PyYAML
+        has been built with it.
 
         Arguments:
             name (str): Name of the fit result.
+            cov_dtype (`numpy.dtype`, optional): Type used to store the covariance matrix.
+                See `from_roofit`. Defaults to `numpy.float64`.
 
         Return:
             self
@@ -177,21 +373,67 @@ class FitResult(object):
             KeyError: If any of the FitResult data is missing from the input file.
 
         """
-        try:
-            yaml_config = load_config(_paths.get_fit_result_path(name),
-                                      validate=('fit-parameters',
-                                                'fit-parameters-initial',
-                                                'covariance-matrix/quality',
-                                                'covariance-matrix/matrix',
-                                                'status'))
-            return FitResult.from_yaml(yaml_config)
-        except ConfigError as error:
-            raise KeyError("Missing keys in input file -> {}".format(','.join(error.missing_keys)))
+        return FitResult.from_yaml(_load_fit_result_file(_paths.get_fit_result_path(name)),
+                                   cov_dtype)
+
+    @staticmethod
+    def clear_yaml_cache():
+        """Clear the cache of parsed fit result files used by `from_yaml_file`.
+
+        The cache is already invalidated when a file changes on disk, so this is
+        only needed to free memory.
+
+        """
+        with _YAML_CACHE_LOCK:
+            _YAML_CACHE.clear()
+
+    @staticmethod
+    def from_yaml_files(names, n_jobs=1):
+        """Initialize several fit results from their YAML files.
+
+        File names are determined by get_fit_result_path. If more than one job is
+        requested, the files are parsed in parallel in a pool of processes.
+
+        Arguments:
+            names (iterable[str]): Names of the fit results.
+            n_jobs (int, optional): Number of processes used for parsing. Defaults to 1.
+
+        Return:
+            list[FitResult]
+
+        Raise:
+            OSError: If any of the files cannot be found.
+            KeyError: If any of the FitResult data is missing from the input files.
+
+        """
+        file_names = [_paths.get_fit_result_path(name) for name in names]
+        n_jobs = min(n_jobs, len(file_names))
+        if n_jobs > 1:
+            pool = multiprocessing.Pool(n_jobs)
+            try:
+                yaml_configs = pool.map(_load_fit_result_file,
+                                        file_names,
+                                        chunksize=max(1, len(file_names) // (4 * n_jobs)))
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            yaml_configs = [_load_fit_result_file(file_name) for file_name in file_names]
+        return [FitResult.from_yaml(yaml_config) for yaml_config in yaml_configs]
 
     @ensure_initialized
-    def to_yaml(self):
+    def to_yaml(self, binary_cov=False):
         """Convert fit result to YAML format.
 
+        The output is built only once and it shares data with the fit result,
+        so it must not be modified.
+
+        Arguments:
+            binary_cov (bool, optional): Store the covariance matrix as a base64-encoded
+                block of doubles instead of a list of floats. This is much faster to
+                write and read for fits with many parameters, but is not human readable.
+                Defaults to False.
+
         Return:
             str: Output dictionary in YAML format.
 
@@ -199,18 +441,35 @@ class FitResult(object):
             NotInitializedError: If the fit result has not been initialized.
 
         """
-        result = copy.deepcopy(self._result)
-        result['covariance-matrix']['matrix'] = self._result['covariance-matrix']['matrix'].getA1()
-        return result
+        if binary_cov not in self._yaml_cache:
+            matrix = self._result['covariance-matrix']['matrix']
+            if binary_cov:
+                matrix = {_BINARY_MATRIX_KEY:
+                          base64.b64encode(matrix.astype('<f8').tobytes()).decode('ascii')}
+            else:
+                matrix = matrix.astype(np.float64, copy=False).ravel().tolist()
+            # Only the covariance matrix needs to be converted, the rest can be shared
+            result = copy.copy(self._result)
+            result['covariance-matrix'] = {'quality': self._result['covariance-matrix']['quality'],
+                                           'matrix': matrix}
+            self._yaml_cache[binary_cov] = result
+        return self._yaml_cache[binary_cov]
 
     @ensure_initialized
-    def to_yaml_file(self, name):
+    def to_yaml_file(self, name, binary_cov=False, json_cache=False):
         """Convert fit result to YAML format.
 
         File name is determined by get_fit_result_path.
 
+        Optionally, a JSON copy of the result is stored next to the YAML file, together
+        with the modification time and size of the YAML file. It is used by `from_yaml_file`
+        as long as the YAML file doesn't change, since JSON is much faster to parse.
+
         Arguments:
             name (str): Name of the fit result.
+            binary_cov (bool, optional): Store the covariance matrix in binary form.
+                See `to_yaml`. Defaults to False.
+            json_cache (bool, optional): Write the JSON cache file. Defaults to False.
 
         Return:
             str: Output file name.
@@ -220,9 +479,46 @@ class FitResult(object):
 
         """
         with _paths.work_on_file(name, path_func=_paths.get_fit_result_path) as file_name:
-            write_config(self.to_yaml(), file_name)
+            write_config(self.to_yaml(binary_cov=binary_cov), file_name)
+            json_file_name = _get_json_cache_path(file_name)
+            if json_cache:
+                json_cache = OrderedDict((('yaml-signature', list(_get_file_signature(file_name))),
+                                          ('fit-result', self.to_yaml(binary_cov=True))))
+                with open(json_file_name, 'w') as json_file:
+                    json.dump(json_cache, json_file)
+            elif os.path.exists(json_file_name):  # Remove stale cache
+                os.remove(json_file_name)
         return file_name
 
+    def _get_fit_parameter_table(self):
+        """Get the fit parameters as a table.
+
+        The table is built on first use and then reused.
+
+        Return:
+            tuple (list, list, `numpy.ndarray`): Parameter names, plain column names (see
+                `to_plain_dict`, shared between fit results) and (N, 4) array of their values
+                and errors, in the order given by `_SUFFIXES`.
+
+        Raise:
+            ValueError: If a fit parameter doesn't have one value per entry in `_SUFFIXES`.
+
+        """
+        if self._fit_parameter_table is None:
+            fit_parameters = self._result['fit-parameters']
+            for param_name, param_value in fit_parameters.items():
+                if len(param_value) != len(_SUFFIXES):
+                    raise ValueError("Fit parameter {} has {} values, expected {}"
+                                     .format(param_name, len(param_value), len(_SUFFIXES)))
+            names = list(fit_parameters.keys())
+            columns = _get_plain_columns(tuple(names))
+            values = np.fromiter(chain.from_iterable(fit_parameters.values()),
+                                 dtype=np.float64,
+                                 count=len(fit_parameters) * len(_SUFFIXES))
+            values = values.reshape(len(fit_parameters), len(_SUFFIXES))
+            self._fit_parameter_table = (names, columns, values)
+        return self._fit_parameter_table
+
     @ensure_initialized
     def to_plain_dict(self, skip_cov=True):
         """Convert fit result into a pandas-friendly format.
@@ -236,11 +532,9 @@ class FitResult(object):
             pandas.DataFrame
 
         """
-        pandas_dict = OrderedDict(((param_name + suffix, val)
-                                   for param_name, param in self._result['fit-parameters'].items()
-                                   for val, suffix in zip(param, _SUFFIXES)))
-        pandas_dict.update(OrderedDict((param_name, val) for param_name, val
-                                       in self._result['const-parameters'].items()))
+        _, param_columns, param_values = self._get_fit_parameter_table()
+        pandas_dict = OrderedDict(zip(param_columns, param_values.ravel().tolist()))
+        pandas_dict.update(self._result['const-parameters'])
         pandas_dict['status_migrad'] = self._result['status'].get('MIGRAD', -1)
         pandas_dict['status_hesse'] = self._result['status'].get('HESSE', -1)
         pandas_dict['status_minos'] = self._result['status'].get('MINOS', -1)
@@ -248,10 +542,42 @@ class FitResult(object):
         pandas_dict['edm'] = self._result['edm']
         pandas_dict['min_nll'] = self._result['min_nll']
         if not skip_cov:
-            pandas_dict['cov_matrix'] = self._result['covariance-matrix']['matrix'].getA1()
+            pandas_dict['cov_matrix'] = self._result['covariance-matrix']['matrix'].ravel()
         return pandas_dict
 
     @ensure_initialized
+    def to_plain_arrays(self):
+        """Get the fit parameters in array form.
+
+        The names match the columns of `to_plain_dict`, so a pandas DataFrame can
+        be built directly from them without going through a dictionary.
+
+        Return:
+            tuple (list, `numpy.ndarray`): Column names and their values. The array
+                is shared with the fit result, so it must not be modified.
+
+        """
+        _, param_columns, param_values = self._get_fit_parameter_table()
+        return param_columns, param_values.ravel()
+
+    @staticmethod
+    def to_dataframe(fit_results, skip_cov=True):
+        """Convert several fit results into a single pandas DataFrame.
+
+        Arguments:
+            fit_results (iterable[FitResult]): Fit results to convert.
+            skip_cov (bool, optional): Skip the covariance matrix. Defaults to True.
+
+        Return:
+            pandas.DataFrame: One row per fit result, with the columns given by `to_plain_dict`.
+
+        Raise:
+            NotInitializedError: If any of the fit results has not been initialized.
+
+        """
+        records = [fit_result.to_plain_dict(skip_cov=skip_cov) for fit_result in fit_results]
+        return pd.DataFrame.from_records(records)
+
     def get_fit_parameter(self, name):
         """Get the fit parameter and its errors.
 
@@ -266,9 +592,9 @@ class FitResult(object):
             KeyError: If the parameter is unknown.
 
         """
+        self._check()
         return self._result['fit-parameters'][name]
 
-    @ensure_initialized
     def get_const_parameter(self, name):
         """Get the const parameter.
 
@@ -282,6 +608,7 @@ class FitResult(object):
             KeyError: If the parameter is unknown.
 
         """
+        self._check()
         return self._result['const-parameters'][name]
 
     @ensure_initialized
@@ -304,27 +631,62 @@ class FitResult(object):
         """
         return self._result['const-parameters']
 
-    @ensure_initialized
+    def _get_param_index(self):
+        """Get the position of each fit parameter in the covariance matrix.
+
+        Return:
+            dict: Parameter names as keys and their index as values.
+
+        """
+        if self._param_index is None:
+            self._param_index = {param: index
+                                 for index, param in enumerate(self._result['fit-parameters'])}
+        return self._param_index
+
     def get_covariance_matrix(self, params=None):
         """Get the fit covariance matrix.
 
+        Sub-matrices are cached for the most recently requested sets of parameters.
+
+        Note:
+            The returned matrix is read-only, so modifying it in place raises `ValueError`.
+            Use `get_covariance_matrix(params).copy()` to get a modifiable matrix.
+
         Arguments:
             params (iterable, optional): Iterable of fit parameters to get the covariance for.
 
         Return:
-            `numpy.matrix`: Covariance matrix.
+            `numpy.ndarray`: Covariance matrix. It is shared with the fit result, and therefore
+                read-only.
 
         Raise:
             ValueError: If a requested parameter is not in the fitted parameters list.
             NotInitializedError: If the FitResult has not been initialized.
 
         """
-        if not params:
-            params = self.get_fit_parameters().keys()
-        params_to_get = [list(self.get_fit_parameters().keys()).index(param) for param in params]
-        return self.get_result()['covariance-matrix']['matrix'][np.ix_(params_to_get, params_to_get)]
+        self._check()
+        if not params:  # Full matrix, no need to select anything
+            cov_matrix = self._result['covariance-matrix']['matrix'].view()
+            cov_matrix.flags.writeable = False
+            return cov_matrix
+        params = tuple(params)
+        if params in self._cov_matrix_cache:
+            # Mark as most recently used
+            self._cov_matrix_cache[params] = self._cov_matrix_cache.pop(params)
+            return self._cov_matrix_cache[params]
+        param_index = self._get_param_index()
+        try:
+            params_to_get = np.fromiter((param_index[param] for param in params),
+                                        dtype=np.intp,
+                                        count=len(params))
+        except KeyError as error:
+            raise ValueError("Unknown fit parameter -> {}".format(error))
+        cov_matrix = self._result['covariance-matrix']['matrix'][np.ix_(params_to_get,
+                                                                        params_to_get)]
+        cov_matrix.flags.writeable = False
+        _add_to_lru_cache(self._cov_matrix_cache, params, cov_matrix, _COV_MATRIX_CACHE_SIZE)
+        return cov_matrix
 
-    @ensure_initialized
     def get_edm(self):
         """Get the fit EDM.
 
@@ -332,9 +694,9 @@ class FitResult(object):
             float
 
         """
+        self._check()
         return self._result['edm']
 
-    @ensure_initialized
     def get_min_nll(self):
         """Get the fit Minimum NLL.
 
@@ -342,6 +704,7 @@ class FitResult(object):
             float
 
         """
+        self._check()
         return self._result['min_nll']
 
     @ensure_initialized
@@ -349,25 +712,72 @@ class FitResult(object):
         """Determine whether the fit has converged properly.
 
         All steps have to have converged and the covariance matrix quality needs to be
-        good.
+        good. The result is computed only once.
 
         """
-        return not any(status for status in self._result['status'].values()) and \
-               self._result['covariance-matrix']['quality'] == 3
+        if self._converged is None:
+            self._converged = self._result['covariance-matrix']['quality'] == 3 and \
+                              not any(self._result['status'].values())
+        return self._converged
 
     @ensure_initialized
     def get_status_string(self):
-        """Get a string summary of the fit status."""
-        output = ", ".join("{}: {}".format(step, STATUS[step].get(status, status))
-                           for step, status in self._result['status'].items())
-        output += ", COVMATRIX: {}".format(COV_CODES[self._result['covariance-matrix']['quality']])
-        return output
+        """Get a string summary of the fit status.
+
+        Steps or codes without a description are shown as their raw code.
+
+        """
+        output = ["{}: {}".format(step, STATUS.get(step, {}).get(status, status))
+                  for step, status in self._result['status'].items()]
+        cov_quality = self._result['covariance-matrix']['quality']
+        output.append("COVMATRIX: {}".format(COV_CODES.get(cov_quality, cov_quality)))
+        return ", ".join(output)
+
+    def _get_sampling_factors(self, params):
+        """Get the mean and the factorized covariance matrix for sampling the given parameters.
+
+        The covariance matrix is factorized once per set of parameters (see
+        `analysis.utils.random_numbers.factorize_covariance`), keeping only the most
+        recently used ones.
+
+        Arguments:
+            params (tuple): Fit parameters to sample.
+
+        Return:
+            tuple (`numpy.ndarray`, `numpy.ndarray`): Mean and covariance factor :math:`L`.
+
+        """
+        if params in self._sampling_cache:
+            # Mark as most recently used
+            self._sampling_cache[params] = self._sampling_cache.pop(params)
+            return self._sampling_cache[params]
+        fit_parameters = self._result['fit-parameters']
+        mean = np.array([fit_parameters[param_name][0] for param_name in params],
+                        dtype=np.float64)
+        cov_factor = factorize_covariance(self.get_covariance_matrix(params))
+        _add_to_lru_cache(self._sampling_cache, params, (mean, cov_factor),
+                          _COV_MATRIX_CACHE_SIZE)
+        return mean, cov_factor
+
+    def _sample_pars(self, params, n_samples):
+        """Sample the given parameters according to the covariance matrix.
+
+        Arguments:
+            params (tuple): Fit parameters to sample.
+            n_samples (int): Number of samples.
+
+        Return:
+            `numpy.ndarray`: (n_samples, len(params)) array of samples.
+
+        """
+        return multivariate_normal(*self._get_sampling_factors(params), size=n_samples)
 
     @ensure_initialized
     def generate_random_pars(self, params=None, include_const=False):
         """Generate random variation of the fit parameters.
 
-        Use a multivariate Gaussian according to the covariance matrix.
+        Use a multivariate Gaussian according to the covariance matrix. Its factorization
+        is cached, so repeated calls with the same parameters are cheap.
 
         Arguments:
             params (iterable, optional): Iterable of fit parameters to get. If None is given, all
@@ -380,15 +790,178 @@ class FitResult(object):
 
         """
         if params is None:
-            params = self.get_fit_parameters().keys()
-        param_values = [self.get_fit_parameter(param_name) for param_name in params]
-        # pylint: disable=E1101
-        output = OrderedDict(zip(params,
-                                 np.random.multivariate_normal([param[0] for param in param_values],
-                                                               self.get_covariance_matrix(params))))
+            params = self._result['fit-parameters'].keys()
+        params = tuple(params)
+        output = OrderedDict(zip(params, self._sample_pars(params, 1)[0]))
         if include_const:
-            for name, param in self.get_const_parameters().items():
+            for name, param in self._result['const-parameters'].items():
                 output[name] = param
         return output
 
+    @ensure_initialized
+    def generate_random_pars_batch(self, n_samples, params=None, include_const=False):
+        """Generate several random variations of the fit parameters at once.
+
+        All samples are drawn in a single vectorized operation, which is much faster
+        than calling `generate_random_pars` in a loop.
+
+        Arguments:
+            n_samples (int): Number of variations to generate.
+            params (iterable, optional): Iterable of fit parameters to get. If None is given, all
+                parameters are varied.
+            include_const (bool, optional): Return constant parameters? Defaults to False. If
+                True is given, constant parameters are additionally included independent of
+                `param_list`.
+
+        Return:
+            pandas.DataFrame: One row per variation, one column per parameter.
+
+        """
+        if params is None:
+            params = self._result['fit-parameters'].keys()
+        params = tuple(params)
+        output = pd.DataFrame(self._sample_pars(params, n_samples), columns=params)
+        if include_const:
+            for name, param in self._result['const-parameters'].items():
+                output[name] = param
+        return output
+
+
+class FitResultCollection(object):
+    """Collection of fit results of the same model.
+
+    The fit parameters of all results are stored in a single (n_results, 4 * n_params)
+    array and the covariance matrices in a (n_results, n_params, n_params) array, so
+    batch analyses (toy studies, systematic scans) don't need to go through each
+    `FitResult` separately.
+
+    """
+
+    def __init__(self, fit_results):
+        """Gather the fit results.
+
+        Arguments:
+            fit_results (iterable[FitResult]): Fit results to store. They need to have
+                the same fit parameters, in the same order.
+
+        Raise:
+            ValueError: If no fit result is given or they don't share the fit parameters.
+            NotInitializedError: If any of the fit results has not been initialized.
+
+        """
+        fit_results = list(fit_results)
+        if not fit_results:
+            raise ValueError("No fit results given")
+        for fit_result in fit_results:
+            fit_result._check()  # pylint: disable=W0212
+        param_names, columns, _ = fit_results[0]._get_fit_parameter_table()  # pylint: disable=W0212
+        const_names = list(fit_results[0].get_const_parameters().keys())
+        n_params = len(param_names)
+        self._param_names = tuple(param_names)
+        self._columns = columns
+        self._values = np.empty((len(fit_results), len(columns)), dtype=np.float64)
+        self._cov_matrices = np.empty((len(fit_results), n_params, n_params), dtype=np.float64)
+        self._extra = OrderedDict((name, []) for name in const_names)
+        for name in ('status_migrad', 'status_hesse', 'status_minos',
+                     'cov_quality', 'edm', 'min_nll'):
+            self._extra[name] = []
+        for result_num, fit_result in enumerate(fit_results):
+            result_names, _, values = fit_result._get_fit_parameter_table()  # pylint: disable=W0212
+            if tuple(result_names) != self._param_names:
+                raise ValueError("Fit results don't share the same fit parameters")
+            self._values[result_num] = values.ravel()
+            self._cov_matrices[result_num] = fit_result.get_covariance_matrix()
+            result = fit_result.get_result()
+            for name in const_names:
+                self._extra[name].append(result['const-parameters'][name])
+            self._extra['status_migrad'].append(result['status'].get('MIGRAD', -1))
+            self._extra['status_hesse'].append(result['status'].get('HESSE', -1))
+            self._extra['status_minos'].append(result['status'].get('MINOS', -1))
+            self._extra['cov_quality'].append(result['covariance-matrix']['quality'])
+            self._extra['edm'].append(result['edm'])
+            self._extra['min_nll'].append(result['min_nll'])
+
+    @staticmethod
+    def from_yaml_files(names, n_jobs=1):
+        """Load a collection of fit results from their YAML files.
+
+        Arguments:
+            names (iterable[str]): Names of the fit results.
+            n_jobs (int, optional): Number of processes used for parsing (see
+                `FitResult.from_yaml_files`). Defaults to 1.
+
+        Return:
+            FitResultCollection
+
+        Raise:
+            OSError: If any of the files cannot be found.
+            KeyError: If any of the FitResult data is missing from the input files.
+            ValueError: If the fit results don't share the fit parameters.
+
+        """
+        return FitResultCollection(FitResult.from_yaml_files(names, n_jobs=n_jobs))
+
+    def __len__(self):
+        """Get the number of fit results."""
+        return self._values.shape[0]
+
+    def get_param_names(self):
+        """Get the names of the fit parameters.
+
+        Return:
+            tuple[str]
+
+        """
+        return self._param_names
+
+    def get_fit_parameter(self, name):
+        """Get the values and errors of a fit parameter for all the fit results.
+
+        Arguments:
+            name (str): Name of the fit parameter.
+
+        Return:
+            `numpy.ndarray`: (n_results, 4) array with the parameter value, Hesse error and
+                upper and lower Minos errors. It is a view on the collection data.
+
+        Raise:
+            KeyError: If the parameter is unknown.
+
+        """
+        try:
+            param_num = self._param_names.index(name)
+        except ValueError:
+            raise KeyError(name)
+        n_suffixes = len(_SUFFIXES)
+        return self._values[:, param_num * n_suffixes:(param_num + 1) * n_suffixes]
+
+    def get_covariance_matrices(self):
+        """Get the covariance matrices of all the fit results.
+
+        Return:
+            `numpy.ndarray`: (n_results, n_params, n_params) array. It is shared with
+                the collection, so it must not be modified.
+
+        """
+        return self._cov_matrices
+
+    def to_dataframe(self, skip_cov=True):
+        """Convert the collection into a pandas DataFrame.
+
+        The columns are the same as in `FitResult.to_dataframe`.
+
+        Arguments:
+            skip_cov (bool, optional): Skip the covariance matrix. Defaults to True.
+
+        Return:
+            pandas.DataFrame: One row per fit result.
+
+        """
+        frame = pd.DataFrame(self._values, columns=self._columns)
+        for name, values in self._extra.items():
+            frame[name] = values
+        if not skip_cov:
+            frame['cov_matrix'] = list(self._cov_matrices.reshape(len(self), -1))
+        return frame
+
 # EOF
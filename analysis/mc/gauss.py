@@ -99,6 +99,51 @@ GAUSS_CONFIG = {  # Step name: Sim09c - 2011 - MU - Pythia8
                                'conddb': 'sim-20170721-2-vc-md100'}}
 
 
+# Normalization of the magnet polarity names
+_POLARITIES = {'up': 'up', 'mu': 'up', 'magup': 'up', 'magnetup': 'up',
+               'down': 'down', 'md': 'down', 'magdown': 'down', 'magnetdown': 'down'}
+
+
+def _build_version_table():
+    """Build the lookup table of Gauss versions.
+
+    Return:
+        dict: Gauss version for each (simulation version, year).
+
+    Raise:
+        AssertionError: If the saved configurations are not coherent.
+
+    """
+    versions = {}
+    for (sim, year, _), info in GAUSS_CONFIG.items():
+        assert versions.setdefault((sim, year), info['version']) == info['version']
+    return versions
+
+
+_GAUSS_VERSIONS = _build_version_table()
+
+
+def _get_config_key(sim_version, year, magnet_polarity):
+    """Get the GAUSS_CONFIG key for the given simulation configuration.
+
+    Arguments:
+        sim_version (str): Simulation version.
+        year (int): Year to generate.
+        magnet_polarity (str): Magnet polarity to generate.
+
+    Return:
+        tuple: Configuration key.
+
+    Raise:
+        KeyError: If there is no configuration registered with the given input parameters.
+
+    """
+    key = (sim_version.lower(), int(year), _POLARITIES.get(magnet_polarity.lower()))
+    if key not in GAUSS_CONFIG:
+        raise KeyError("Unknown Gauss configuration: {}, {}, {}".format(sim_version, year, magnet_polarity))
+    return key
+
+
 def get_gauss_version(sim_version, year):
     """Get the Gauss version for a given simulation configuration.
 
@@ -111,18 +156,12 @@ def get_gauss_version(sim_version, year):
 
     Raise:
         KeyError: If there is no configuration registered with the given input parameters.
-        AssertionError: If the saved configurations are not coherent.
 
     """
-    year = int(year)
-    sim_version = sim_version.lower()
-    versions = set(info['version']
-                   for (sim, conf_year, mag), info in GAUSS_CONFIG.items()
-                   if sim == sim_version and conf_year == year)
-    if not versions:
+    try:
+        return _GAUSS_VERSIONS[(sim_version.lower(), int(year))]
+    except KeyError:
         raise KeyError("Unknown Gauss configuration: {}, {}".format(sim_version, year))
-    assert len(versions) == 1
-    return versions.pop()
 
 
 def get_gaudirun_options(sim_version, year, magnet_polarity, simulate_detector=False):
@@ -136,19 +175,16 @@ def get_gaudirun_options(sim_version, year, magnet_polarity, simulate_detector=F
             the Pythia output. Defaults to False.
 
     Return:
-        list: Options to run gaudirun.py.
+        list: Options to run gaudirun.py. It is a new list, so it can be freely modified.
 
     Raise:
         KeyError: If there is no configuration registered with the given input parameters.
 
     """
-    key = (sim_version.lower(), int(year), magnet_polarity.lower().lstrip('mag').lstrip('magnet'))
-    if key not in GAUSS_CONFIG:
-        raise KeyError("Unknown Gauss configuration: {}, {}, {}".format(sim_version, year, magnet_polarity))
-    options = GAUSS_CONFIG[key]['options']
+    options = GAUSS_CONFIG[_get_config_key(sim_version, year, magnet_polarity)]['options']
     if simulate_detector:
-        options.append('$GAUSSOPTS/GenStandAlone.py')
-    return options
+        return options + ['$GAUSSOPTS/GenStandAlone.py']
+    return list(options)
 
 
 def get_db_tags(sim_version, year, magnet_polarity):
@@ -166,9 +202,7 @@ def get_db_tags(sim_version, year, magnet_polarity):
         KeyError: If there is no configuration registered with the given input parameters.
 
     """
-    key = (sim_version.lower(), int(year), magnet_polarity.lower().lstrip('mag').lstrip('magnet'))
-    if key not in GAUSS_CONFIG:
-        raise KeyError("Unknown Gauss configuration: {}, {}, {}".format(sim_version, year, magnet_polarity))
-    return GAUSS_CONFIG[key]['dddb'], GAUSS_CONFIG[key]['conddb']
+    config = GAUSS_CONFIG[_get_config_key(sim_version, year, magnet_polarity)]
+    return config['dddb'], config['conddb']
 
 # EOF
@@ -10,7 +10,6 @@ from __future__ import print_function, division, absolute_import
 
 import argparse
 import os
-from math import ceil
 
 import analysis.utils.config as _config
 import analysis.utils.paths as _paths
@@ -20,6 +19,10 @@ from analysis.utils.logging_color import get_logger
 
 logger = get_logger('analysis.efficiency.gen_level')
 
+# Default maximum number of tasks per array job. Slurm (MaxArraySize) and Torque
+# (max_job_array_size) limit it to 1001 and 1024 by default, respectively
+DEFAULT_MAX_ARRAY_SIZE = 1000
+
 SCRIPT = """#!{shell}
 #####################################
 {header}
@@ -33,24 +36,33 @@ if [ -f $HOME/.localrc ]; then
 fi
 source LbLogin.sh -c x86_64-slc6-gcc48-opt
 source SetupProject.sh Gauss {gauss_version}
-seed=`echo ${jobid_var} | cut -d'.' -f1`
+# Job ID of the array and index of this task in it, kept separate to avoid seed clashes
+jobid=`echo ${array_jobid_var} | cut -d'.' -f1 | cut -d'[' -f1`
+task=${array_index_var}
+# Run {chain_size} generation chunks. All of them use the array job ID as run number and
+# start at a different event number, so their random seeds don't overlap
+for chunk in `seq 0 $(({chain_size} - 1))`; do
+first_event=$((((task - 1) * {chain_size} + chunk) * {n_events} + 1))
+chunk_name=${{jobid}}_${{task}}_${{chunk}}
 echo "------------------------------------------------------------------------"
-echo "Seed is "$seed
+echo "Run number is "$jobid", first event is "$first_event
 echo "------------------------------------------------------------------------"
 # Prepare job
 cd {workdir}
-mkdir $seed
-cd $seed
+mkdir $chunk_name
+# Clean up even if the job fails
+trap 'rm -rf {workdir}/${{chunk_name:?}}' EXIT
+cd $chunk_name
 echo "Workdir: "$PWD
-seedfile={workdir}/$seed/$seed.py
+seedfile={workdir}/$chunk_name/$chunk_name.py
 echo "from Configurables import GenInit, LHCbApp, Gauss
 GaussGen = GenInit('GaussGen')
-GaussGen.FirstEventNumber = 1
-GaussGen.RunNumber = $seed
+GaussGen.FirstEventNumber = $first_event
+GaussGen.RunNumber = $jobid
 LHCbApp().EvtMax = {n_events}
 LHCbApp().DDDBtag   = '{dddb_tag}'
 LHCbApp().CondDBtag = '{conddb_tag}'
-Gauss().DatasetName = '$seed'" > $seedfile
+Gauss().DatasetName = '$chunk_name'" > $seedfile
 echo "Config file:"
 cat $seedfile
 # Run
@@ -60,22 +72,22 @@ echo "Done"
 ls -ltr
 [ -d {output_path} ] || mkdir -p {output_path}
 [ -d {output_path_link} ] || mkdir -p {output_path_link}
-echo "Copying output to {output_path}"
-cp $seed-*.{output_extension} {output_path}
-cp $seed-*-histos.root {output_path}
-output_gen_log={output_path_link}/${{seed}}_GeneratorLog.xml
-echo "Copying GeneratorLog.xml : ${{output_gen_log}}"
-cp GeneratorLog.xml ${{output_gen_log}}
-echo "Copying output histos"
-cp $seed-*-histos.root {output_path}
+# The workdir is removed afterwards, so move instead of copying
+echo "Moving output to {output_path}"
+mv $chunk_name-*.{output_extension} {output_path}
+mv $chunk_name-*-histos.root {output_path}
+output_gen_log={output_path_link}/${{chunk_name}}_GeneratorLog.xml
+echo "Moving GeneratorLog.xml : ${{output_gen_log}}"
+mv GeneratorLog.xml ${{output_gen_log}}
 ls -ltr
 # Do links
 if [ "{do_link}" == true ]; then
     echo "Links requested to {output_path_link}"
-    ln -sf {output_path}/$seed-* {output_path_link}/
+    ln -sf {output_path}/$chunk_name-* {output_path_link}/
 fi
 # Cleanup
-rm -rf {workdir}/$seed
+rm -rf {workdir}/$chunk_name
+done
 echo "------------------------------------------------------------------------"
 echo "Job ended on" `date`
 echo "------------------------------------------------------------------------"
@@ -85,12 +97,16 @@ echo "------------------------------------------------------------------------"
 def run(config_files, link_from):
     """Run the script.
 
+    The production is submitted as array jobs of at most `batch/max-array-size` tasks.
+    Each task runs `prod/chain-size` generation chunks of `prod/nevents-per-job` events
+    one after the other.
+
     Arguments:
         config_files (list[str]): Path to the configuration files.
         link_from (str): Path to link the results from.
 
     Return:
-        int: Number of submitted jobs.
+        int: Number of submitted array tasks.
 
     Raise:
         OSError: If the configuration file does not exist.
@@ -134,8 +150,21 @@ def run(config_files, link_from):
     except ValueError:  # There's non-numerical chars, we assume it's a path
         decfile = evt_type if os.path.isabs(evt_type) else os.path.abspath(evt_type)
         evt_type = os.path.splitext(os.path.split(decfile)[1])[0]
+        local_decfile = decfile
     else:
         decfile = '$DECFILESROOT/options/{}.py'.format(evt_type)
+        if 'DECFILESROOT' in os.environ:
+            local_decfile = os.path.join(os.environ['DECFILESROOT'],
+                                         'options', '{}.py'.format(evt_type))
+        else:
+            local_decfile = None
+    # Check the decfile before submitting, otherwise all jobs would fail after setting up
+    if local_decfile is None:
+        logger.warning("DECFILESROOT is not defined, cannot check the decfile for event type %s",
+                       evt_type)
+    elif not os.path.isfile(local_decfile):
+        logger.error("Cannot find decfile -> %s", local_decfile)
+        raise KeyError("Unknown event type -> {}".format(evt_type))
     # Prepare job
     _, _, log_file = _paths.prepare_path(name='mc/{}'.format(evt_type),
                                          path_func=_paths.get_log_path,
@@ -166,10 +195,13 @@ def run(config_files, link_from):
         logger.error("Unknown Gauss configuration")
         raise KeyError(str(error))
     # Add compression and our decfile
-    options.append('$APPCONFIGOPTS/Persistency/Compression-ZLIB-1.py')
+    compression = config['prod'].get('compression', 'ZLIB-1')
+    options.append('$APPCONFIGOPTS/Persistency/Compression-{}.py'.format(compression))
     options.append(decfile)
     # Prepare to submit
     nevents = min(config['prod']['nevents-per-job'], config['prod']['nevents'])
+    # Several jobs can be run one after the other in the same batch job to save setup time
+    chain_size = max(1, int(config['prod'].get('chain-size', 1)))
     logger.info("Generating %s events of decfile -> %s", nevents, decfile)
     logger.info("Output path: %s", output_path)
     logger.info("Log file location: %s", os.path.dirname(log_file))
@@ -184,30 +216,39 @@ def run(config_files, link_from):
                     'output_extension': 'xgen' if remove_detector else 'sim',
                     'output_path': output_path,
                     'output_path_link': output_path_link,
-                    'n_events': nevents}
+                    'n_events': nevents,
+                    'chain_size': chain_size}
     # Prepare batch
-    batch_config = config.get('batch', {})
+    batch_config = dict(config.get('batch', {}))
+    max_array_size = int(batch_config.pop('max-array-size', DEFAULT_MAX_ARRAY_SIZE))
     try:
         batch_system = get_batch_system(batch_config.get('backend', None))
     except ValueError:
         raise
     # Submit
-    njobs = int(ceil(1.0 * config['prod']['nevents'] / config['prod']['nevents-per-job']))
-    logger.info("About to send %s jobs with %s events each.", njobs, nevents)
-    for _ in range(njobs):
-        # Submit
-        try:
-            job_id = batch_system.submit_job('MC_%s' % evt_type, SCRIPT, log_file,
-                                             extra_config=extra_config,
-                                             **batch_config)
+    # Integer ceil
+    njobs = -(-int(config['prod']['nevents']) // int(config['prod']['nevents-per-job']))
+    n_batch_jobs = -(-njobs // chain_size)
+    logger.info("About to send %s jobs, each running %s chunks of %s events.",
+                n_batch_jobs, chain_size, nevents)
+    # All jobs are identical, so submit them as array jobs, split to respect the
+    # maximum array size of the batch system. Each array has its own job ID, so
+    # the seeds of their tasks don't clash
+    try:
+        for first_job in range(0, n_batch_jobs, max_array_size):
+            job_id = batch_system.submit_array_job('MC_%s' % evt_type, SCRIPT, log_file,
+                                                   array_size=min(max_array_size,
+                                                                  n_batch_jobs - first_job),
+                                                   extra_config=extra_config,
+                                                   **batch_config)
             if 'submit error' in job_id:
                 logger.error(job_id)
                 raise Exception
-            logger.debug("Submitted job -> %s", job_id)
-        except Exception:
-            logger.exception('Error submitting MC production job')
-            raise RuntimeError
-    return njobs
+            logger.info("Submitted array job -> %s", job_id)
+    except Exception:
+        logger.exception('Error submitting MC production job')
+        raise RuntimeError
+    return n_batch_jobs
 
 
 def main():
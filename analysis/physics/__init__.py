@@ -8,18 +8,25 @@
 """Physics utilities."""
 from __future__ import print_function, division, absolute_import
 
-import traceback
+import logging
+import threading
 from collections import OrderedDict
 
 import ROOT
 
 from analysis import get_global_var
+from analysis.physics import factory
 from analysis.utils.config import get_shared_vars, configure_parameter, recursive_dict_copy
 from analysis.utils.exceptions import ConfigError
 from analysis.utils.logging_color import get_logger
 
 logger = get_logger('analysis.physics')
 
+# Resolved factory classes, indexed by (observable, pdf_type). Cleared on registration
+# and when the PHYSICS_FACTORIES registry they were resolved from is replaced
+_FACTORY_CACHE = {}
+_FACTORY_CACHE_REGISTRY = None  # Registry the cache refers to
+
 
 # logger.setLevel(10)
 
@@ -45,14 +52,19 @@ def register_physics_factories(observable, factories):
 
     """
     logger.debug("Registering factories for the '%s' observable -> %s", observable, factories)
-    get_global_var('PHYSICS_FACTORIES')[observable].update(factories)
-    return len(get_global_var('PHYSICS_FACTORIES')[observable])
+    observable_factories = get_global_var('PHYSICS_FACTORIES')[observable]
+    observable_factories.update(factories)
+    _FACTORY_CACHE.clear()
+    return len(observable_factories)
 
 
 # Factory loading
 def get_physics_factory(observable, pdf_type):
     """Get physics factory.
 
+    The resolved classes are cached until new factories are registered or the
+    `PHYSICS_FACTORIES` registry is replaced.
+
     Arguments:
         observable (str): Observable name.
         pdf_type (str): Type of the pdf.
@@ -64,12 +76,25 @@ def get_physics_factory(observable, pdf_type):
         KeyError: If the type of factory is unknown.
 
     """
-    factories = get_global_var('PHYSICS_FACTORIES')
-    if observable not in factories:
+    global _FACTORY_CACHE_REGISTRY  # pylint: disable=W0603
+    physics_factories = get_global_var('PHYSICS_FACTORIES')
+    if _FACTORY_CACHE_REGISTRY is not physics_factories:  # The registry has been replaced
+        _FACTORY_CACHE.clear()
+        _FACTORY_CACHE_REGISTRY = physics_factories
+    try:
+        return _FACTORY_CACHE[(observable, pdf_type)]
+    except KeyError:
+        pass
+    # Don't index directly, PHYSICS_FACTORIES is a defaultdict
+    observable_factories = physics_factories.get(observable)
+    if observable_factories is None:
         raise KeyError("Unknown observable type -> {}".format(observable))
-    if pdf_type not in factories[observable]:
+    try:
+        factory_class = observable_factories[pdf_type]
+    except KeyError:
         raise KeyError("Unknown PDF type -> {}".format(pdf_type))
-    return factories[observable][pdf_type]
+    _FACTORY_CACHE[(observable, pdf_type)] = factory_class
+    return factory_class
 
 
 # Load and configure physics factory
@@ -82,176 +107,254 @@ def rename_on_recursion_end(func):
 
     """
 
+    recursion = threading.local()  # Depth of the recursion, per thread
+
     def wrapped(*args, **kwargs):
-        """Check the parent caller to determine when to rename.
+        """Keep track of the recursion depth to determine when to rename.
 
         Raise:
             RuntimeError: If the wrapped function doesn't return a physics
                 factory.
 
         """
-        import analysis.physics.factory as factory
-        res_factory = func(*args, **kwargs)
+        recursion.depth = getattr(recursion, 'depth', 0) + 1
+        try:
+            res_factory = func(*args, **kwargs)
+        finally:
+            recursion.depth -= 1
         if isinstance(res_factory, Exception):
             logger.error("Uncaught exception")
             raise res_factory
         if not isinstance(res_factory, factory.BaseFactory):
             raise RuntimeError("rename_on_recursion_end used on a non-compliant function.")
-        if len([frame[2]
-                for frame in traceback.extract_stack()
-                if frame[2] == func.__name__]) == 0:
+        if recursion.depth == 0:
             res_factory.rename_children_parameters()
         return res_factory
 
     return wrapped
 
 
-@rename_on_recursion_end
-def configure_model(config, shared_vars=None, external_vars=None):
+# Model configuration helpers, used by configure_model
+def _sanitize_parameter(param, name, title):
+    """Convert a parameter configuration into a ROOT object and its constraint.
+
+    Arguments:
+        param (object): Parameter configuration, already configured ROOT object or
+            (ROOT object, constraint) pair.
+        name (str): Name of the parameter, if it needs to be created.
+        title (str): Title of the parameter, if it needs to be created.
+
+    Return:
+        tuple: Parameter and its constraint (None if not constrained).
+
     """
+    if isinstance(param, ROOT.TObject):  # Already configured
+        return param, None
+    constraint = None
+    if isinstance(param, (list, tuple)):
+        param, constraint = param
+    if not isinstance(param, ROOT.TObject):
+        param, constraint = configure_parameter(name, title, param)
+    return param, constraint
+
+
+def _configure_factory(observable, config, shared_vars):
+    """Configure a single physics factory.
+
+    Note:
+        The yield is removed from `config` and stored in `shared_vars`.
+
+    Arguments:
+        observable (str): Observable of the factory.
+        config (dict): Factory configuration.
+        shared_vars (dict): Shared variables of the factory.
+
+    Return:
+        `analysis.physics.factory.PhysicsFactory`
+
+    """
+    logger.debug("Configuring factory -> %s", config)
+    if 'yield' in config:
+        yield_ = config.pop('yield')
+        if 'yield' not in shared_vars:
+            shared_vars['yield'] = _sanitize_parameter(yield_, 'Yield', 'Yield')
+    # if 'yield' in shared_vars:
+    #     shared_vars['yield'][0].setStringAttribute('shared', 'true')
+    return get_physics_factory(observable, config['pdf'])(config, shared_vars)
+
+
+def _configure_prod_factory(config, shared_vars):
+    """Configure a product of physics factories.
+
+    Arguments:
+        config (dict): Product configuration, with the children under `pdf`.
+        shared_vars (dict): Shared variables of the product.
+
+    Return:
+        `analysis.physics.factory.PhysicsFactory`
 
     Raise:
-        ConfigError: If the shared parameters are badly configured.
+        ConfigError: If any of the children defines a yield.
 
     """
+    logger.debug("Configuring product -> %s", config['pdf'])
+    # Parameter propagated disabled
+    # params = config.get('parameters', {})
+    # params.update(config['pdf'].pop('parameters', {}))
+    # # Propagate parameters down
+    # for observable, factory_config in config['pdf'].items():
+    #     if 'parameters' not in factory_config:
+    #         factory_config['parameters'] = {}
+    #     factory_config['parameters'].update(params)
+    if len(config['pdf']) == 1:
+        observable, factory_config = next(iter(config['pdf'].items()))
+        return _configure_factory(observable, factory_config, shared_vars['pdf'][observable])
+    else:
+        # Check the yields
+        for child_config in config['pdf'].values():
+            if 'yield' in child_config:
+                raise ConfigError("Yield of a RooProductPdf defined in one of the children.")
+        if shared_vars and 'yield' in shared_vars:
+            config['yield'] = shared_vars['yield']
+        elif 'yield' in config:
+            config['yield'] = _sanitize_parameter(config['yield'], 'Yield', 'Yield')
+        # if 'yield' in config:
+        #     config['yield'][0].setStringAttribute('shared', 'true')
+        # Create the product
+        return factory.ProductPhysicsFactory(OrderedDict((observable,
+                                                          _configure_factory(observable,
+                                                                             factory_config,
+                                                                             shared_vars['pdf'][observable]))
+                                                         for observable, factory_config
+                                                         in config.pop('pdf').items()),
+                                             parameters=config)
+        # parameters={param_name: (param_val, None)
+        #             for param_name, param_val in params.items()})
+
+
+def _configure_sum_factory(config, shared_vars):
+    """Configure a sum of physics factories.
 
-    def sanitize_parameter(param, name, title):
-        constraint = None
-        if isinstance(param, (list, tuple)):
-            param, constraint = param
-        if not isinstance(param, ROOT.TObject):
-            param, constraint = configure_parameter(name, title, param)
-        return param, constraint
-
-    def configure_factory(observable, config, shared_vars):
-        logger.debug("Configuring factory -> %s", config)
-        if 'yield' in config:
-            yield_ = config.pop('yield')
-            if 'yield' not in shared_vars:
-                shared_vars['yield'] = sanitize_parameter(yield_, 'Yield', 'Yield')
-        # if 'yield' in shared_vars:
-        #     shared_vars['yield'][0].setStringAttribute('shared', 'true')
-        return get_physics_factory(observable, config['pdf'])(config, shared_vars)
-
-    def configure_prod_factory(config, shared_vars):
-        logger.debug("Configuring product -> %s", config['pdf'])
-        # Parameter propagated disabled
-        # params = config.get('parameters', {})
-        # params.update(config['pdf'].pop('parameters', {}))
-        # # Propagate parameters down
-        # for observable, factory_config in config['pdf'].items():
-        #     if 'parameters' not in factory_config:
-        #         factory_config['parameters'] = {}
-        #     factory_config['parameters'].update(params)
-        if len(config['pdf']) == 1:
-            observable = list(config['pdf'].keys())[0]
-            factory_config = list(config['pdf'].values())[0]
-            return configure_factory(observable, factory_config, shared_vars['pdf'][observable])
-        else:
-            # Check the yields
-            for child_config in config['pdf'].values():
-                if 'yield' in child_config:
-                    raise ConfigError("Yield of a RooProductPdf defined in one of the children.")
-            if shared_vars and 'yield' in shared_vars:
-                config['yield'] = shared_vars['yield']
-            elif 'yield' in config:
-                config['yield'] = sanitize_parameter(config['yield'], 'Yield', 'Yield')
-            # if 'yield' in config:
-            #     config['yield'][0].setStringAttribute('shared', 'true')
-            # Create the product
-            return factory.ProductPhysicsFactory(OrderedDict((observable,
-                                                              configure_factory(observable,
-                                                                                factory_config,
-                                                                                shared_vars['pdf'][observable]))
-                                                             for observable, factory_config
-                                                             in config.pop('pdf').items()),
-                                                 parameters=config)
-            # parameters={param_name: (param_val, None)
-            #             for param_name, param_val in params.items()})
-
-    def configure_sum_factory(config, shared_vars):
+    Arguments:
+        config (dict): Sum configuration.
+        shared_vars (dict): Shared variables of the sum.
+
+    Return:
+        `analysis.physics.factory.PhysicsFactory`
+
+    Raise:
+        ConfigError: If the yields are badly specified.
+
+    """
+    if logger.isEnabledFor(logging.DEBUG):  # Avoid copying the config for nothing
         logger.debug("Configuring sum -> %s", dict(config))
-        factories = OrderedDict()
-        yields = OrderedDict()
-        global_yield = config.pop('yield', None)
-        for pdf_name, pdf_config in config.items():
-            # Disable parameter propagation
-            # if 'parameters' not in pdf_config:
-            #     pdf_config['parameters'] = OrderedDict()
-            # pdf_config['parameters'].update({param_name: (param_val, None)
-            #                                  for param_name, param_val
-            #                                  in config.get('parameters', {}).items()})
-            if 'yield' in shared_vars[pdf_name]:
-                yields[pdf_name] = shared_vars[pdf_name].pop('yield')
-            if 'yield' in pdf_config:
-                yield_ = pdf_config.pop('yield')
-                if pdf_name not in yields:
-                    yields[pdf_name] = sanitize_parameter(yield_, 'Yield', 'Yield')
-                    # yields[pdf_name][0].setStringAttribute('shared', 'true')
-            if isinstance(pdf_config.get('pdf'), str):
-                factories[pdf_name] = configure_model({pdf_name: pdf_config}, shared_vars)
-            else:
-                factories[pdf_name] = configure_model(pdf_config, shared_vars[pdf_name])
-        logger.debug("Found yields -> %s", yields)
-        if len(factories) == 1:
-            # Set the yield
-            factory_name, factory_obj = list(factories.items())[0]
-            if factory_name in yields:
-                factory_obj.set_yield_var(yields[factory_name])
-            output_factory = factory_obj
+    factories = OrderedDict()
+    yields = OrderedDict()
+    global_yield = config.pop('yield', None)
+    for pdf_name, pdf_config in config.items():
+        # Disable parameter propagation
+        # if 'parameters' not in pdf_config:
+        #     pdf_config['parameters'] = OrderedDict()
+        # pdf_config['parameters'].update({param_name: (param_val, None)
+        #                                  for param_name, param_val
+        #                                  in config.get('parameters', {}).items()})
+        if 'yield' in shared_vars[pdf_name]:
+            yields[pdf_name] = shared_vars[pdf_name].pop('yield')
+        if 'yield' in pdf_config:
+            yield_ = pdf_config.pop('yield')
+            if pdf_name not in yields:
+                yields[pdf_name] = _sanitize_parameter(yield_, 'Yield', 'Yield')
+                # yields[pdf_name][0].setStringAttribute('shared', 'true')
+        # Leaf factory, no need to go through configure_model
+        if isinstance(pdf_config.get('pdf'), str):
+            factories[pdf_name] = _configure_factory(pdf_name, pdf_config, shared_vars[pdf_name])
         else:
-            parameters = {}
-            if (len(factories) - len(yields)) > 1:
-                raise ConfigError("Missing at least one yield in sum factory definition")
-            elif (len(factories) - len(yields)) == 1:
-                if list(yields.keys())[-1] == list(factories.keys())[-1]:  # The last one should not have a yield!
-                    raise ConfigError("Wrong order in yield/factory specification")
-            output_factory = factory.SumPhysicsFactory(factories, yields, parameters)
-        if global_yield:
-            output_factory.set_yield_var(global_yield)
-        return output_factory
-
-    def configure_simul_factory(config, shared_vars):
+            factories[pdf_name] = configure_model(pdf_config, shared_vars[pdf_name])
+    logger.debug("Found yields -> %s", yields)
+    if len(factories) == 1:
+        # Set the yield
+        factory_name, factory_obj = next(iter(factories.items()))
+        if factory_name in yields:
+            factory_obj.set_yield_var(yields[factory_name])
+        output_factory = factory_obj
+    else:
+        parameters = {}
+        if (len(factories) - len(yields)) > 1:
+            raise ConfigError("Missing at least one yield in sum factory definition")
+        elif (len(factories) - len(yields)) == 1:
+            if next(reversed(yields)) == next(reversed(factories)):  # The last one should not have a yield!
+                raise ConfigError("Wrong order in yield/factory specification")
+        output_factory = factory.SumPhysicsFactory(factories, yields, parameters)
+    if global_yield:
+        output_factory.set_yield_var(global_yield)
+    return output_factory
+
+
+def _configure_simul_factory(config, shared_vars):
+    """Configure a simultaneous physics factory.
+
+    Arguments:
+        config (dict): Simultaneous configuration, with the categories and the
+            configuration of each category label.
+        shared_vars (dict): Shared variables of the simultaneous factory.
+
+    Return:
+        `analysis.physics.factory.SimultaneousPhysicsFactory`
+
+    Raise:
+        ConfigError: If the category labels are badly defined.
+
+    """
+    if logger.isEnabledFor(logging.DEBUG):  # Avoid copying the config for nothing
         logger.debug("Configuring simultaneous -> %s", dict(config))
-        categories = config['categories'].split(',') \
-            if isinstance(config['categories'], str) \
-            else config['categories']
-        cat_list = []
-        if len(categories) == 1:
-            cat = ROOT.RooCategory(categories[0], categories[0])
-            cat_list.append(cat)
-        else:
-            cat_set = ROOT.RooArgSet()
-            for cat_name in categories:
-                cat_list.append(ROOT.RooCategory(cat_name, cat_name))
-                cat_set.add(cat_list[-1])
-            cat = ROOT.RooSuperCategory('x'.join(categories),
-                                        'x'.join(categories),
-                                        cat_set)
-        labels = [set() for _ in range(len(categories))]
-        for cat_label in config['pdf'].keys():
-            for cat_iter, cat_sublabel in enumerate(cat_label.split(',')):
-                cat_sublabel = cat_sublabel.strip()
-                try:
-                    if cat_sublabel not in labels[cat_iter]:
-                        logger.debug("Registering label for %s -> %s", cat_list[cat_iter].GetName(), cat_sublabel)
-                        cat_list[cat_iter].defineType(cat_sublabel)
-                    labels[cat_iter].add(cat_sublabel)
-                except IndexError:
-                    logger.error("Mismatch between declared number of categories and label '%s'", cat_label)
-                    raise ConfigError("Badly defined category label '{}'".format(cat_label))
-        sim_factory = factory.SimultaneousPhysicsFactory(OrderedDict((tuple(cat_label.replace(' ', '').split(',')),
-                                                                      configure_model(cat_config,
-                                                                                      shared_vars['pdf'][cat_label]))
-                                                                     for cat_label, cat_config
-                                                                     in config['pdf'].items()),
-                                                         cat)
-        for cat in cat_list:
-            sim_factory.set('cat_{}'.format(cat.GetName()), cat)
-        return sim_factory
-
-    import analysis.physics.factory as factory
+    categories = config['categories'].split(',') \
+        if isinstance(config['categories'], str) \
+        else config['categories']
+    cat_list = []
+    if len(categories) == 1:
+        cat = ROOT.RooCategory(categories[0], categories[0])
+        cat_list.append(cat)
+    else:
+        cat_set = ROOT.RooArgSet()
+        for cat_name in categories:
+            cat_list.append(ROOT.RooCategory(cat_name, cat_name))
+            cat_set.add(cat_list[-1])
+        cat = ROOT.RooSuperCategory('x'.join(categories),
+                                    'x'.join(categories),
+                                    cat_set)
+    # Split the labels only once, they are needed for the types and the factory
+    split_labels = OrderedDict((cat_label, tuple(cat_label.replace(' ', '').split(',')))
+                               for cat_label in config['pdf'])
+    labels = [set() for _ in range(len(categories))]
+    for cat_label, cat_sublabels in split_labels.items():
+        if len(cat_sublabels) > len(cat_list):
+            logger.error("Mismatch between declared number of categories and label '%s'", cat_label)
+            raise ConfigError("Badly defined category label '{}'".format(cat_label))
+        for cat_iter, cat_sublabel in enumerate(cat_sublabels):
+            if cat_sublabel not in labels[cat_iter]:
+                logger.debug("Registering label for %s -> %s", cat_list[cat_iter].GetName(), cat_sublabel)
+                cat_list[cat_iter].defineType(cat_sublabel)
+                labels[cat_iter].add(cat_sublabel)
+    sim_factory = factory.SimultaneousPhysicsFactory(OrderedDict((split_labels[cat_label],
+                                                                  configure_model(cat_config,
+                                                                                  shared_vars['pdf'][cat_label]))
+                                                                 for cat_label, cat_config
+                                                                 in config['pdf'].items()),
+                                                     cat)
+    for cat in cat_list:
+        sim_factory.set('cat_{}'.format(cat.GetName()), cat)
+    return sim_factory
+
+
+@rename_on_recursion_end
+def configure_model(config, shared_vars=None, external_vars=None):
+    """
 
+    Raise:
+        ConfigError: If the shared parameters are badly configured or the configuration
+            contains cycles.
+
+    """
     # copy: to not alter argument; shallow (not deep!): do not duplicate ROOT objects
     config = recursive_dict_copy(config, to_copy=(list, tuple))
     # Prepare shared variables
@@ -262,27 +365,20 @@ def configure_model(config, shared_vars=None, external_vars=None):
             raise ConfigError(error)
     # Let's find out what is this
     if 'categories' in config:
-        return configure_simul_factory(config, shared_vars)
+        return _configure_simul_factory(config, shared_vars)
     else:
         if 'pdf' not in config:
-            indices = list(range(len(config)))
-            try:  # remove 'yield'
-                indices.pop(list(config.keys()).index('yield'))
-            except ValueError:  # no yield defined
-                index = 0
-            else:
-                index = indices[0]
-            if isinstance(list(config.values())[index].get('pdf'), str):
+            first_config = next(value for key, value in config.items() if key != 'yield')
+            if isinstance(first_config.get('pdf'), str):
                 shared = {'pdf': shared_vars}
-                return configure_prod_factory({'pdf': config}, shared)
+                return _configure_prod_factory({'pdf': config}, shared)
             else:
-                return configure_sum_factory(config, shared_vars)
+                return _configure_sum_factory(config, shared_vars)
         else:
             if len(config['pdf']) > 1:
-                return configure_prod_factory(config, shared_vars)
+                return _configure_prod_factory(config, shared_vars)
             else:
-                pdf_obs = list(config['pdf'].keys())[0]
-                pdf_config = list(config['pdf'].values())[0]
+                pdf_obs, pdf_config = next(iter(config['pdf'].items()))
                 if 'parameters' not in pdf_config:
                     pdf_config['parameters'] = OrderedDict()
                 pdf_config['parameters'].update(config.get('parameters', {}))
@@ -291,7 +387,7 @@ def configure_model(config, shared_vars=None, external_vars=None):
                     sh_vars['parameters'].update(shared_vars['parameters'])
                 else:
                     sh_vars['parameters'] = shared_vars['parameters']
-                return configure_factory(observable=pdf_obs, config=pdf_config, shared_vars=sh_vars)
+                return _configure_factory(observable=pdf_obs, config=pdf_config, shared_vars=sh_vars)
     raise RuntimeError()
 
 # EOF
@@ -332,7 +332,9 @@ class BaseFactory(object):
             raise InvalidRequestError("Requested non-extended PDF, "
                                       "but the factory needs to be extended")
         pdf_name = 'pdf_{}'.format(name)
-        return self.get(pdf_name, self.set(pdf_name, self.get_unbound_pdf(name, title)))
+        if pdf_name not in self:  # Only build the PDF once, it can be reused across fits
+            self.set(pdf_name, self.get_unbound_pdf(name, title))
+        return self[pdf_name]
 
     def get_unbound_pdf(self, name, title):
         """Get the physics PDF.
@@ -362,7 +364,9 @@ class BaseFactory(object):
             logger.warning("Specified yield value but it's already defined. Ignoring.")
         # Avoid name clashes
         pdf_name = 'pdfext_{}'.format(name)
-        return self.get(pdf_name, self.set(pdf_name, self.get_unbound_extended_pdf(name, title)))
+        if pdf_name not in self:  # Only build the PDF once, it can be reused across fits
+            self.set(pdf_name, self.get_unbound_extended_pdf(name, title))
+        return self[pdf_name]
 
     def get_unbound_extended_pdf(self, name, title):
         """Get an extended physics PDF."""
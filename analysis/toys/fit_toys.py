@@ -166,22 +166,25 @@ def run(config_files, link_from, verbose):
         raise KeyError("ConfigError raised -> {}".format(error.missing_keys))
     except KeyError as error:
         logger.error("YAML parsing error -> %s", error)
+    fit_config = config['fit']
     try:
         models = {model_name: config[model_name]
                   for model_name
-                  in config['fit'].get('models', ['model'])}
+                  in fit_config.get('models', ['model'])}
     except KeyError as error:
         logger.error("Missing model configuration -> %s", str(error))
         raise KeyError("Missing model configuration")
     if not models:
         logger.error("Empty list specified in the config file under 'fit/models'!")
         raise KeyError()
-    fit_strategies = config['fit'].get('strategies', ['simple'])
+    fit_strategies = fit_config.get('strategies', ['simple'])
     if not fit_strategies:
         logger.error("Empty fit strategies were specified in the config file!")
         raise KeyError()
     # Some info
-    nfits = config['fit'].get('nfits-per-job', config['fit']['nfits'])
+    nfits = fit_config.get('nfits-per-job', fit_config['nfits'])
+    fit_extended = fit_config.get('extended', False)
+    fit_minos = fit_config.get('minos', False)
     logger.info("Doing %s sample/fit sequences", nfits)
     logger.info("Fit job name: %s", config['name'])
     if link_from:
@@ -321,8 +324,8 @@ def run(config_files, link_from, verbose):
                                      fit_strategy,
                                      dataset,
                                      verbose,
-                                     Extended=config['fit'].get('extended', False),
-                                     Minos=config['fit'].get('minos', False))
+                                     Extended=fit_extended,
+                                     Minos=fit_minos)
                 except ValueError:
                     raise RuntimeError()
                 # Now results are in fit_parameters
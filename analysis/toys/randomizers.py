@@ -17,6 +17,7 @@ from analysis.data.converters import pandas_from_dataset, dataset_from_pandas
 from analysis.data.mergers import merge_root
 from analysis.fit.result import FitResult
 from analysis.utils.logging_color import get_logger
+from analysis.utils.random_numbers import factorize_covariance, multivariate_normal
 from analysis.utils.root import list_to_rooargset, list_to_rooarglist, iterate_roocollection
 
 logger = get_logger('analysis.toys.randomizers')
@@ -262,6 +263,8 @@ class FixedParamsRandomizer(ToyRandomizer):
                                    for param in param_translation.keys()])
         # Check that there is a correspondence between the fit result and parameters in the generation PDF
         self._cov_matrix = make_block(*cov_matrices)
+        # Factorize only once for all toys
+        self._cov_factor = factorize_covariance(self._cov_matrix)
         self._central_values = np.array(central_values)
         self._pdf_index = OrderedDict()
         for fit_param in param_translation.values():
@@ -287,7 +290,7 @@ class FixedParamsRandomizer(ToyRandomizer):
             int: Number of randomized parameters.
 
         """
-        random_values = np.random.multivariate_normal(self._central_values, self._cov_matrix)
+        random_values = multivariate_normal(self._central_values, self._cov_factor)
         for param_num, (param_name, pdf_index) in enumerate(self._pdf_index.items()):
             pdf_label, pdf_num = pdf_index
             self._gen_pdfs[pdf_label][pdf_num].getVariables()[param_name].setVal(random_values[param_num])
@@ -202,6 +202,7 @@ def main():
         3: Conflicting options given.
         4: A non-matching configuration file was found in the output.
         5: The queue submission command cannot be found.
+        6: Error in job submission.
         128: Uncaught error. An exception is logged.
 
     """
@@ -223,6 +224,9 @@ def main():
     parser.add_argument('--overwrite',
                         action='store_true', default=False,
                         help="Overwrite previous production")
+    parser.add_argument('--submit-fanout',
+                        action='store', type=int, default=1,
+                        help="Maximum number of jobs to submit concurrently")
     parser.add_argument('config',
                         action='store', type=str, nargs='+',
                         help="Configuration file")
@@ -289,7 +293,8 @@ def main():
                       link_from=args.link_from,
                       extend=args.extend,
                       overwrite=args.overwrite,
-                      verbose=args.verbose).run(script_to_run, )
+                      verbose=args.verbose,
+                      submit_fanout=args.submit_fanout).run(script_to_run, )
             if scan_config:
                 os.remove(config_file)
         exit_status = 0
@@ -308,6 +313,9 @@ def main():
     except AssertionError:
         logger.error("Cannot find the queue submission command")
         exit_status = 5
+    except RuntimeError as error:
+        logger.error(str(error))
+        exit_status = 6
     # pylint: disable=W0703
     except Exception as error:
         exit_status = 128
@@ -9,6 +9,10 @@
 from __future__ import print_function, division, absolute_import
 
 import os
+import random
+import tempfile
+import time
+from multiprocessing.pool import ThreadPool
 
 import analysis.utils.config as _config
 import analysis.utils.paths as _paths
@@ -17,6 +21,11 @@ from analysis.utils.logging_color import get_logger
 
 logger = get_logger('analysis.toys.submitter')
 
+# Submissions slower than this (in seconds) are considered a sign of a loaded scheduler
+_SLOW_SUBMISSION_TIME = 2.0
+# Maximum delay between consecutive submissions, in seconds
+_MAX_SUBMISSION_DELAY = 30.0
+
 
 # pylint: disable=too-few-public-methods
 class ToySubmitter(object):
@@ -47,7 +56,7 @@ class ToySubmitter(object):
     NTOYS_KEY = None
     NTOYS_PER_JOB_KEY = None
 
-    def __init__(self, config_files, link_from, extend, overwrite, verbose=False):
+    def __init__(self, config_files, link_from, extend, overwrite, verbose=False, submit_fanout=1):
         """Configure the toy submitter.
 
         Arguments:
@@ -55,6 +64,9 @@ class ToySubmitter(object):
             link_from (str): Storage to link from.
             extend (bool): Extend the production?
             overwrite (bool): Overwrite an existing production?
+            verbose (bool, optional): Run the jobs in verbose mode? Defaults to False.
+            submit_fanout (int, optional): Maximum number of jobs submitted concurrently.
+                Defaults to 1.
 
         Raise:
             NotImplementedError: If some of the mandatory attributes are not
@@ -91,7 +103,8 @@ class ToySubmitter(object):
             raise ValueError()
         # Store infotmation
         self.config = config
-        self.allowed_config_diffs = set([self.NTOYS_KEY, self.NTOYS_PER_JOB_KEY, 'batch/runtime']
+        self.allowed_config_diffs = set([self.NTOYS_KEY, self.NTOYS_PER_JOB_KEY,
+                                         'batch/runtime', 'batch/scheduler-latency']
                                         + self.ALLOWED_CONFIG_DIFFS)
         # Assign link-from giving priority to the argument
         self.config['link-from'] = link_from if link_from else config.get('link-from')
@@ -99,6 +112,7 @@ class ToySubmitter(object):
         self.extend = extend
         self.overwrite = overwrite
         self.verbose = verbose
+        self.submit_fanout = max(1, submit_fanout)
         # Get the batch system
         self.batch_system = get_batch_system()
 
@@ -115,6 +129,7 @@ class ToySubmitter(object):
             AssertionError: If the qsub command cannot be found.
             AttributeError: If non-matching configuration file was found.
             OSError: If there is a problem preparing the output path.
+            RuntimeError: If a job cannot be submitted. The remaining jobs are not submitted.
 
         """
         flat_config = dict(_config.unfold_config(self.config))
@@ -166,18 +181,56 @@ class ToySubmitter(object):
         # Calculate number of jobs and submit
         ntoys = flat_config[self.NTOYS_KEY]
         ntoys_per_job = flat_config.get(self.NTOYS_PER_JOB_KEY, ntoys)
-        n_jobs = int(1.0 * ntoys / ntoys_per_job)
-        if ntoys % ntoys_per_job:
-            n_jobs += 1
+        n_jobs = -(-int(ntoys) // int(ntoys_per_job))  # Integer ceil
         # Submit!
         _config.write_config(self.config, config_file_dest)
-        for _ in range(n_jobs):
-            # Write the config file
-            job_id = self.batch_system.submit_script(job_name=self.config['name'],
+        batch_config = dict(self.config.get('batch', {}))
+        min_delay = float(batch_config.pop('scheduler-latency', 0.0))
+        # All jobs are identical, so the job script is built only once
+        job_script = self.batch_system.render_script(job_name=self.config['name'],
                                                      cmd_script=script_to_run,
                                                      script_args=script_args,
                                                      log_file=log_file_fmt,
-                                                     **self.config.get('batch', {}))
-            logger.info('Submitted JobID: %s', job_id)
+                                                     **batch_config)
+
+        # and all submissions refer to the same file
+        with tempfile.NamedTemporaryFile('w', suffix='.sh', delete=False) as file_:
+            file_.write(job_script)
+            job_script_file = file_.name
+
+        def submit(_):
+            """Submit one job."""
+            return self.batch_system.submit_file(job_script_file)
+
+        n_workers = min(self.submit_fanout, n_jobs)
+        try:
+            if n_workers > 1:
+                # Submission is dominated by the scheduler response time, so send
+                # several jobs at once
+                pool = ThreadPool(n_workers)
+                try:
+                    for job_id in pool.imap_unordered(submit, range(n_jobs)):
+                        logger.info('Submitted JobID: %s', job_id)
+                except Exception:
+                    pool.terminate()  # Don't submit the remaining jobs
+                    raise
+                else:
+                    pool.close()
+                finally:
+                    pool.join()
+            else:
+                # Back off exponentially if the scheduler is slow to respond
+                delay = min_delay
+                for job_num in range(n_jobs):
+                    start_time = time.time()
+                    logger.info('Submitted JobID: %s', submit(job_num))
+                    if time.time() - start_time > _SLOW_SUBMISSION_TIME:
+                        delay = min(2 * delay + 0.5, _MAX_SUBMISSION_DELAY)
+                    else:
+                        delay = max(0.5 * delay, min_delay)
+                    if delay and job_num < n_jobs - 1:
+                        time.sleep(delay + random.uniform(0, 0.1))
+        finally:
+            os.remove(job_script_file)
 
 # EOF
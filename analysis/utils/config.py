@@ -226,12 +226,14 @@ def write_config(config, file_name):
                 node.flow_style = best_style
         return node
 
-    # Configure Dumper
-    yaml.add_representer(OrderedDict, represent_ordereddict)
+    # Configure Dumper, using the libyaml emitter if available
+    dumper = getattr(yaml, 'CDumper', yaml.Dumper)
+    dumper.add_representer(OrderedDict, represent_ordereddict)
     # Dump
     with open(file_name, 'w') as output_file:
         yaml.dump(config,
                   output_file,
+                  Dumper=dumper,
                   default_flow_style=False,
                   allow_unicode=True,
                   indent=4)
@@ -268,17 +270,31 @@ def unfold_config(dictionary):
         set: Unfolded dictionary.
 
     """
-    output_list = []
+    return list(iter_unfold_config(dictionary))
+
+
+def iter_unfold_config(dictionary):
+    """Iterate over the key, value pairs of a dictionary, recursively.
+
+    This is the lazy version of :py:func:`unfold_config`, which avoids building
+    intermediate lists when the pairs are only needed once.
+
+    Arguments:
+        dictionary (dict): Dictionary to unfold.
+
+    Yields:
+        tuple: Key, value pair, with the key of nested dictionaries joined by '/'.
+
+    """
     for key, val in dictionary.items():
         if isinstance(val, dict):
-            for sub_key, sub_val in unfold_config(val):
+            for sub_key, sub_val in iter_unfold_config(val):
                 # convert non-hashable values to hashable (approximately)
                 if isinstance(sub_val, list):
                     sub_val = tuple(sub_val)
-                output_list.append(('{}/{}'.format(key, sub_key), sub_val))
+                yield '{}/{}'.format(key, sub_key), sub_val
         else:
-            output_list.append((key, val))
-    return output_list
+            yield key, val
 
 
 def fold_config(unfolded_data, dict_class=dict):
@@ -397,7 +413,7 @@ def get_shared_vars(config, external_vars=None):
     """
     # Create shared vars
     parameter_configs = OrderedDict((config_element, config_value)
-                                    for config_element, config_value in unfold_config(config)
+                                    for config_element, config_value in iter_unfold_config(config)
                                     if isinstance(config_value, str) and '@' in config_value)
     # First build the shared var
     refs = {} if not external_vars else external_vars
@@ -433,17 +449,24 @@ def get_shared_vars(config, external_vars=None):
         raise ValueError("Some shared parameters failed to be configured. Maximum recursion reached.")
     # Now replace the refs by the shared variables in a recursive defaultdict
     recurse_dict = lambda: defaultdict(recurse_dict)
-    new_config = []
-    for config_element, ref_val in parameter_configs.items():
-        if ref_val.startswith('@'):
-            new_config.append((config_element,
-                               refs[ref_val.split('/')[0][1:]]))
-        else:  # Composite parameter definition, such as SHIFT
-            var_name = ''.join(random.choice(string.ascii_uppercase + string.digits) for _ in range(15))
-            var, constraint = configure_parameter(var_name, var_name, ref_val, refs)
-            var.setStringAttribute('tempName', 'true')
-            new_config.append((config_element, (var, constraint)))
-    return fold_config(new_config, recurse_dict)
+
+    def iter_shared_config():
+        """Iterate over the configuration elements and their shared variables.
+
+        Yields:
+            tuple: Configuration element, (variable, constraint) pair.
+
+        """
+        for config_element, ref_val in parameter_configs.items():
+            if ref_val.startswith('@'):
+                yield config_element, refs[ref_val.split('/')[0][1:]]
+            else:  # Composite parameter definition, such as SHIFT
+                var_name = ''.join(random.choice(string.ascii_uppercase + string.digits) for _ in range(15))
+                var, constraint = configure_parameter(var_name, var_name, ref_val, refs)
+                var.setStringAttribute('tempName', 'true')
+                yield config_element, (var, constraint)
+
+    return fold_config(iter_shared_config(), recurse_dict)
 
 
 def recursive_dict_copy(x, to_copy=None):
@@ -461,6 +484,11 @@ def recursive_dict_copy(x, to_copy=None):
         to_copy (cls or list/tuple/set of cls): if any element is an instance of cls,
             it is copied (shallow). Otherwise a reference will remain in the new dict pointing
             to the old dicts object.
+
+    Raise:
+        TypeError: If *x* is not a dictionary.
+        ConfigError: If *x* contains itself, ie, it is cyclic.
+
     """
     iterables = (list, tuple, set)
     dicts = (dict, OrderedDict)
@@ -470,15 +498,35 @@ def recursive_dict_copy(x, to_copy=None):
         to_copy = (to_copy,)
 
     to_copy = set(to_copy)
-    new_dict = copy.copy(x)
+    copy_classes = None if (len(to_copy) == 1 and None in to_copy) else tuple(to_copy)
+
+    def copy_level(level, ancestors):
+        """Copy one level of the dictionary.
+
+        Arguments:
+            level (dict): Dictionary to copy.
+            ancestors (set): `id` of the dictionaries being copied that contain `level`.
 
-    # iterate and call recursive
-    for key, val in x.items():
-        if isinstance(val, dicts):
-            new_dict[key] = recursive_dict_copy(x=val, to_copy=to_copy)
-        elif not (len(to_copy) == 1 and None in to_copy) and isinstance(val, tuple(to_copy)):
-            new_dict[key] = copy.copy(val)
+        Return:
+            dict: Copy of `level`.
 
-    return new_dict
+        Raise:
+            ConfigError: If `level` contains one of its ancestors.
+
+        """
+        if id(level) in ancestors:
+            raise ConfigError("Cyclic configuration, a dictionary contains itself")
+        ancestors.add(id(level))
+        new_dict = copy.copy(level)
+        # iterate and call recursive
+        for key, val in level.items():
+            if isinstance(val, dicts):
+                new_dict[key] = copy_level(val, ancestors)
+            elif copy_classes is not None and isinstance(val, copy_classes):
+                new_dict[key] = copy.copy(val)
+        ancestors.remove(id(level))
+        return new_dict
+
+    return copy_level(x, set())
 
 # EOF
@@ -180,7 +180,7 @@ def prepare_path(name, path_func, link_from, *args, **kwargs):
     src_file_name = os.path.join(src_base_dir, rel_file_name)
     # Create dirs
     rel_dir = rel_file_name if os.path.isdir(rel_file_name) else os.path.dirname(rel_file_name)
-    for dir_ in (dest_base_dir, src_base_dir):
+    for dir_ in set((dest_base_dir, src_base_dir)):  # They are the same if there's no linking
         if not os.path.exists(os.path.join(dir_, rel_dir)):
             os.makedirs(os.path.join(dir_, rel_dir))
     return do_link, src_file_name, dest_file_name
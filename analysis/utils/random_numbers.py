@@ -11,6 +11,8 @@ from __future__ import print_function, division, absolute_import
 import os
 import sys
 
+import numpy as np
+
 
 def get_urandom_int(length):
     """Generate a truly random number.
@@ -32,4 +34,46 @@ def get_urandom_int(length):
         rand_int = int(os.urandom(length).encode('hex'), 16)
     return rand_int
 
+
+def factorize_covariance(cov_matrix):
+    """Factorize a covariance matrix as :math:`LL^T` for sampling.
+
+    The Cholesky decomposition is used. If it fails because the matrix is not positive
+    definite, an eigenvalue decomposition is used instead, with negative eigenvalues
+    clipped to 0.
+
+    Arguments:
+        cov_matrix (`numpy.ndarray`): Covariance matrix.
+
+    Return:
+        `numpy.ndarray`: Factor :math:`L`.
+
+    """
+    cov_matrix = np.asarray(cov_matrix, dtype=np.float64)
+    try:
+        return np.linalg.cholesky(cov_matrix)
+    except np.linalg.LinAlgError:
+        eig_vals, eig_vecs = np.linalg.eigh(cov_matrix)
+        return eig_vecs * np.sqrt(np.clip(eig_vals, 0.0, None))
+
+
+def multivariate_normal(mean, cov_factor, size=None):
+    """Sample a multivariate normal distribution from a factorized covariance matrix.
+
+    Equivalent to `numpy.random.multivariate_normal`, but the factorization of the
+    covariance matrix, obtained with `factorize_covariance`, can be reused across calls.
+
+    Arguments:
+        mean (`numpy.ndarray`): Mean of the distribution.
+        cov_factor (`numpy.ndarray`): Factorized covariance matrix.
+        size (int, optional): Number of samples. If `None` is given, a single
+            sample is returned.
+
+    Return:
+        `numpy.ndarray`: Sample of shape (len(mean),) or (size, len(mean)).
+
+    """
+    shape = (len(mean),) if size is None else (size, len(mean))
+    return mean + np.random.standard_normal(shape).dot(cov_factor.T)
+
 # EOF
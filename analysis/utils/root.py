@@ -10,6 +10,8 @@ from __future__ import print_function, division, absolute_import
 
 import os
 
+import numpy as np
+
 import ROOT
 
 
@@ -165,6 +167,66 @@ def iterate_roocollection(collection):
         yield var
 
 
+_ROOREALVAR_EXTRACTOR = """
+#include <string>
+#include <vector>
+#include "RooAbsCollection.h"
+#include "RooRealVar.h"
+
+void analysis_extract_roorealvars(const RooAbsCollection& collection,
+                                  std::vector<std::string>& names,
+                                  std::vector<double>& values)
+{
+  RooFIter iter = collection.fwdIterator();
+  RooAbsArg* arg = 0;
+  while ((arg = iter.next())) {
+    names.push_back(arg->GetName());
+    RooRealVar* var = dynamic_cast<RooRealVar*>(arg);
+    if (var) {
+      values.push_back(var->getVal());
+      values.push_back(var->getError());
+      values.push_back(var->getErrorLo());
+      values.push_back(var->getErrorHi());
+    } else {
+      RooAbsReal* real = dynamic_cast<RooAbsReal*>(arg);
+      values.push_back(real ? real->getVal() : 0.0);
+      values.push_back(0.0);
+      values.push_back(0.0);
+      values.push_back(0.0);
+    }
+  }
+}
+"""
+
+
+def get_roorealvar_values(collection):
+    """Extract the names, values and errors of the variables in a RooAbsCollection.
+
+    The information is extracted in a single call to a compiled helper, which is
+    much faster than calling the getters of each variable from Python.
+
+    Arguments:
+        collection (ROOT.RooAbsCollection): Collection to extract.
+
+    Return:
+        tuple (list, `numpy.ndarray`): Names of the variables and (N, 4) array with their
+            value, Hesse error, lower error and upper error. Errors of non-`RooRealVar`
+            objects are 0.
+
+    """
+    if not hasattr(ROOT, 'analysis_extract_roorealvars'):
+        ROOT.gInterpreter.Declare(_ROOREALVAR_EXTRACTOR)
+    names = ROOT.std.vector('string')()
+    values = ROOT.std.vector('double')()
+    ROOT.analysis_extract_roorealvars(collection, names, values)
+    n_values = values.size()
+    if n_values:  # Copy directly from the vector buffer
+        values = np.frombuffer(values.data(), dtype=np.float64, count=n_values).copy()
+    else:
+        values = np.empty(0, dtype=np.float64)
+    return [str(name) for name in names], values.reshape(-1, 4)
+
+
 def rooargset_to_set(rooargset):
     """Convert RooArgSet to a set.
 
@@ -8,11 +8,18 @@
 """Test the fit module."""
 from __future__ import print_function, division, absolute_import
 
+import json
+from collections import OrderedDict
+
+import numpy as np
 import pytest
 
 import ROOT
 
-from analysis.fit.result import FitResult
+import analysis.fit.result as fit_result_module
+from analysis import get_global_var, set_global_var
+from analysis.fit.result import FitResult, FitResultCollection
+from analysis.utils.config import load_config, write_config
 from analysis.utils.logging_color import get_logger
 
 
@@ -39,6 +46,49 @@ def fit_result():
                            ROOT.RooFit.Minos(True))
 
 
+@pytest.fixture
+def yaml_fit_result():
+    """Create a fit result from its YAML representation."""
+    return FitResult.from_yaml(OrderedDict((
+        ('fit-parameters', OrderedDict((('mu', [0.1, 0.2, -0.2, 0.2]),
+                                        ('sigma', [1.5, 0.1, -0.1, 0.1]),
+                                        ('yield', [50.0, 7.0, -7.0, 7.0])))),
+        ('fit-parameters-initial', OrderedDict((('mu', 0.0),
+                                                ('sigma', 1.0),
+                                                ('yield', 50.0)))),
+        ('covariance-matrix', {'quality': 3,
+                               'matrix': [0.04, 0.001, 0.0,
+                                          0.001, 0.01, 0.002,
+                                          0.0, 0.002, 49.0]}),
+        ('status', OrderedDict((('MIGRAD', 0), ('HESSE', 0)))),
+        ('edm', 1e-6),
+        ('min_nll', -120.0))))
+
+
+@pytest.fixture
+def fit_result_dir(tmpdir):
+    """Store the fit result files in a temporary folder."""
+    base_path = get_global_var('BASE_PATH')
+    set_global_var('BASE_PATH', str(tmpdir))
+    yield str(tmpdir)
+    set_global_var('BASE_PATH', base_path)
+    FitResult.clear_yaml_cache()
+
+
+@pytest.fixture
+def parsed_files(monkeypatch):
+    """Keep track of the files parsed when loading fit results."""
+    file_list = []
+
+    def counting_load_config(*file_names, **options):
+        """Record the parsed files."""
+        file_list.extend(file_names)
+        return load_config(*file_names, **options)
+
+    monkeypatch.setattr(fit_result_module, 'load_config', counting_load_config)
+    return file_list
+
+
 # pylint: disable=W0621
 def test_fitresult_convergence(fit_result):
     """Test fit result convergence."""
@@ -53,4 +103,146 @@ def test_fitresult_yaml_conversion(fit_result):
     assert (res_conv.get_covariance_matrix() == res.get_covariance_matrix()).all()
 
 
+# pylint: disable=W0621
+def test_fitresult_yaml_binary_conversion(fit_result):
+    """Test YAML conversion with binary covariance matrix."""
+    res = FitResult.from_roofit(fit_result)
+    res_conv = FitResult.from_yaml(res.to_yaml(binary_cov=True))
+    assert (res_conv.get_covariance_matrix() == res.get_covariance_matrix()).all()
+
+
+# pylint: disable=W0621
+def test_fitresult_collection(fit_result):
+    """Test the conversion of a fit result collection to pandas."""
+    res = FitResult.from_roofit(fit_result)
+    collection = FitResultCollection([res, res])
+    assert len(collection) == 2
+    assert collection.to_dataframe().equals(FitResult.to_dataframe([res, res]))
+
+
+# pylint: disable=W0621
+def test_fitresult_yaml_cache(yaml_fit_result, fit_result_dir, parsed_files):
+    """Test that fit result files are only parsed again when they change."""
+    file_name = yaml_fit_result.to_yaml_file('cache_test')
+    res = FitResult.from_yaml_file('cache_test')
+    assert FitResult.from_yaml_file('cache_test').get_fit_parameters() == res.get_fit_parameters()
+    assert len(parsed_files) == 1
+    # Modifying a loaded result doesn't affect the cached copy
+    res.get_fit_parameter('mu')[0] = 100.0
+    res.get_result()['status']['MIGRAD'] = 4
+    res_cached = FitResult.from_yaml_file('cache_test')
+    assert res_cached.get_fit_parameter('mu')[0] == 0.1
+    assert res_cached.has_converged()
+    assert len(parsed_files) == 1
+    # Changing the file invalidates the cache
+    new_result = OrderedDict(yaml_fit_result.to_yaml())
+    new_result['min_nll'] = -1300.5
+    write_config(new_result, file_name)
+    assert FitResult.from_yaml_file('cache_test').get_min_nll() == -1300.5
+    assert len(parsed_files) == 2
+
+
+# pylint: disable=W0621
+def test_fitresult_random_pars_batch(yaml_fit_result, monkeypatch):
+    """Test that batch sampling matches sampling the parameters one by one."""
+    monkeypatch.setattr(fit_result_module, '_COV_MATRIX_CACHE_SIZE', 1)
+    np.random.seed(1234)
+    batch = yaml_fit_result.generate_random_pars_batch(5, include_const=True)
+    assert batch.shape == (5, 3)
+    assert list(batch.columns) == ['mu', 'sigma', 'yield']
+    np.random.seed(1234)
+    one_by_one = [list(yaml_fit_result.generate_random_pars().values()) for _ in range(5)]
+    assert np.allclose(batch.values, one_by_one)
+    params_batch = yaml_fit_result.generate_random_pars_batch(7, params=('yield', 'mu'))
+    assert params_batch.shape == (7, 2)
+    assert list(params_batch.columns) == ['yield', 'mu']
+    # Only the most recently used factorizations are kept
+    assert list(yaml_fit_result._sampling_cache) == [('yield', 'mu')]  # pylint: disable=W0212
+
+
+# pylint: disable=W0621
+def test_fitresult_from_yaml_files(yaml_fit_result, fit_result_dir):
+    """Test that parallel loading of fit results matches loading them one by one."""
+    names = ['parallel_{}'.format(num) for num in range(5)]
+    for num, name in enumerate(names):
+        yaml_config = OrderedDict(yaml_fit_result.to_yaml())
+        yaml_config['min_nll'] = -100.0 - num
+        FitResult.from_yaml(yaml_config).to_yaml_file(name)
+    sequential = [FitResult.from_yaml_file(name) for name in names]
+    FitResult.clear_yaml_cache()
+    parallel = FitResult.from_yaml_files(names, n_jobs=2)
+    assert [res.get_min_nll() for res in parallel] == [res.get_min_nll() for res in sequential]
+    for res_par, res_seq in zip(parallel, sequential):
+        assert res_par.get_fit_parameters() == res_seq.get_fit_parameters()
+        assert (res_par.get_covariance_matrix() == res_seq.get_covariance_matrix()).all()
+    # Missing files are reported both in parallel and sequential loading
+    with pytest.raises(OSError):
+        FitResult.from_yaml_files(names + ['missing'], n_jobs=2)
+    with pytest.raises(OSError):
+        FitResult.from_yaml_files(names + ['missing'])
+
+
+# pylint: disable=W0621
+def test_fitresult_json_cache(yaml_fit_result, fit_result_dir, parsed_files):
+    """Test that the JSON cache is only used while the YAML file is unchanged."""
+    file_name = yaml_fit_result.to_yaml_file('json_test', json_cache=True)
+    res = FitResult.from_yaml_file('json_test')
+    assert not parsed_files
+    assert res.get_fit_parameters() == yaml_fit_result.get_fit_parameters()
+    assert (res.get_covariance_matrix() == yaml_fit_result.get_covariance_matrix()).all()
+    # The JSON cache is validated as the YAML file
+    with open(file_name + '.json') as json_file:
+        json_cache = json.load(json_file)
+    del json_cache['fit-result']['status']
+    with open(file_name + '.json', 'w') as json_file:
+        json.dump(json_cache, json_file)
+    FitResult.clear_yaml_cache()
+    with pytest.raises(KeyError):
+        FitResult.from_yaml_file('json_test')
+    # Changing the YAML file invalidates the JSON cache
+    yaml_config = OrderedDict(yaml_fit_result.to_yaml())
+    yaml_config['min_nll'] = -1300.5
+    write_config(yaml_config, file_name)
+    assert FitResult.from_yaml_file('json_test').get_min_nll() == -1300.5
+    assert parsed_files == [file_name]
+
+
+# pylint: disable=W0621
+def test_fitresult_parameter_length(yaml_fit_result):
+    """Test that fit parameters with the wrong number of values are rejected."""
+    yaml_config = OrderedDict(yaml_fit_result.to_yaml())
+    yaml_config['fit-parameters'] = OrderedDict(yaml_config['fit-parameters'])
+    yaml_config['fit-parameters']['sigma'] = [1.5, 0.1, -0.1]
+    with pytest.raises(ValueError) as error:
+        FitResult.from_yaml(yaml_config).to_plain_dict()
+    assert 'sigma' in str(error.value)
+
+
+# pylint: disable=W0621
+def test_fitresult_covariance_matrix(yaml_fit_result, monkeypatch):
+    """Test the caching of covariance sub-matrices and that they are read-only."""
+    monkeypatch.setattr(fit_result_module, '_COV_MATRIX_CACHE_SIZE', 2)
+    full_matrix = yaml_fit_result.get_covariance_matrix()
+    assert full_matrix.shape == (3, 3)
+    with pytest.raises(ValueError):
+        full_matrix[0, 0] = 1.0
+    sub_matrix = yaml_fit_result.get_covariance_matrix(['yield', 'mu'])
+    assert np.array_equal(sub_matrix, [[49.0, 0.0], [0.0, 0.04]])
+    with pytest.raises(ValueError):
+        sub_matrix[0, 0] = 1.0
+    assert np.array_equal(sub_matrix.copy(), sub_matrix)
+    # Cached while it's one of the most recently used
+    assert yaml_fit_result.get_covariance_matrix(('yield', 'mu')) is sub_matrix
+    yaml_fit_result.get_covariance_matrix(['mu'])
+    assert yaml_fit_result.get_covariance_matrix(['yield', 'mu']) is sub_matrix
+    yaml_fit_result.get_covariance_matrix(['sigma'])
+    yaml_fit_result.get_covariance_matrix(['mu'])
+    evicted_matrix = yaml_fit_result.get_covariance_matrix(['yield', 'mu'])
+    assert evicted_matrix is not sub_matrix
+    assert np.array_equal(evicted_matrix, sub_matrix)
+    # The full matrix is not modified
+    assert full_matrix[0, 0] == 0.04
+    with pytest.raises(ValueError):
+        yaml_fit_result.get_covariance_matrix(['unknown'])
+
 # EOF
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# =============================================================================
+# @file   test_gauss.py
+# @author Albert Puig (albert.puig@cern.ch)
+# @date   17.10.2026
+# =============================================================================
+"""Test the Gauss options lookup."""
+from __future__ import print_function, division, absolute_import
+
+import pytest
+
+from analysis.mc.gauss import get_gauss_version, get_gaudirun_options, get_db_tags
+
+
+def test_gauss_version():
+    """Test the Gauss version lookup."""
+    assert get_gauss_version('sim09c', 2016) == 'v49r8'
+    assert get_gauss_version('Sim09c', '2012') == 'v49r8'
+
+
+def test_gauss_config_key():
+    """Test the normalization of the simulation configuration."""
+    assert get_db_tags('Sim09c', '2016', 'MagDown') == ('dddb-20170721-3',
+                                                        'sim-20170721-2-vc-md100')
+    assert get_db_tags('sim09c', 2011, 'mu') == get_db_tags('sim09c', 2011, 'up')
+    assert get_gaudirun_options('sim09c', 2015, 'magnetup') == \
+        get_gaudirun_options('sim09c', 2015, 'up')
+
+
+@pytest.mark.parametrize('sim_version, year, magnet_polarity',
+                         [('sim09c', 2010, 'up'),  # Unknown year
+                          ('sim09c', 2016, 'left'),  # Unknown polarity
+                          ('sim08a', 2016, 'up')])  # Unknown simulation version
+def test_gauss_unknown_config(sim_version, year, magnet_polarity):
+    """Test that unknown configurations are rejected."""
+    with pytest.raises(KeyError):
+        get_db_tags(sim_version, year, magnet_polarity)
+    with pytest.raises(KeyError):
+        get_gaudirun_options(sim_version, year, magnet_polarity)
+    if magnet_polarity == 'up':
+        with pytest.raises(KeyError):
+            get_gauss_version(sim_version, year)
+
+
+def test_gaudirun_options_copy():
+    """Test that the returned options can be modified without affecting later calls."""
+    for simulate_detector in (False, True):
+        options = get_gaudirun_options('sim09c', 2016, 'up', simulate_detector)
+        expected = list(options)
+        options.append('$DECFILESROOT/options/12345678.py')
+        options[0] = 'modified.py'
+        assert get_gaudirun_options('sim09c', 2016, 'up', simulate_detector) == expected
+    assert get_gaudirun_options('sim09c', 2016, 'up', True) == \
+        get_gaudirun_options('sim09c', 2016, 'up') + ['$GAUSSOPTS/GenStandAlone.py']
+
+# EOF
@@ -8,12 +8,15 @@
 """Test imports."""
 from __future__ import print_function, division, absolute_import
 
+from collections import OrderedDict, defaultdict
+
 import yaml
 import yamlloader
 import pytest
 
 import ROOT
 
+from analysis import get_global_var, set_global_var
 import analysis.physics as phys
 import analysis.physics.factory as phys_factory
 import analysis.physics.pdf_models as pdfs
@@ -157,6 +160,57 @@ def factory_with_blind_yield():
         frac: 0.84873 0.1 1.0""")
 
 
+def test_cyclic_config():
+    """Test that cyclic configurations are detected."""
+    factory_config = yaml.load("""mass:
+    pdf: cb
+    parameters:
+        mu: 5246.7 5200 5300""", Loader=yamlloader.ordereddict.CLoader)
+    factory_config['mass']['parameters']['cycle'] = factory_config
+    with pytest.raises(ConfigError):
+        phys.configure_model(factory_config)
+
+
+def test_config_copy_error():
+    """Test that errors copying the configuration are not reported as cycles."""
+
+    class FailingDict(OrderedDict):
+        """Dictionary that cannot be iterated."""
+
+        def items(self):
+            """Fail."""
+            raise RuntimeError("Unrelated error")
+
+    factory_config = yaml.load("""mass:
+    pdf: cb
+    parameters:
+        mu: 5246.7 5200 5300""", Loader=yamlloader.ordereddict.CLoader)
+    factory_config['mass']['parameters'] = FailingDict(factory_config['mass']['parameters'])
+    with pytest.raises(RuntimeError):
+        phys.configure_model(factory_config)
+
+
+def test_factory_registration_after_lookup():
+    """Test that factory lookups follow changes in the registry."""
+    assert phys.get_physics_factory('mass', 'cb') is DoubleCBFactory
+    phys.register_physics_factories('mass', {'cb': ExponentialFactory})
+    try:
+        assert phys.get_physics_factory('mass', 'cb') is ExponentialFactory
+    finally:
+        phys.register_physics_factories('mass', {'cb': DoubleCBFactory})
+    assert phys.get_physics_factory('mass', 'cb') is DoubleCBFactory
+    # Replace the full registry
+    physics_factories = get_global_var('PHYSICS_FACTORIES')
+    set_global_var('PHYSICS_FACTORIES', defaultdict(dict, {'mass': {'cb': ExponentialFactory}}))
+    try:
+        assert phys.get_physics_factory('mass', 'cb') is ExponentialFactory
+        with pytest.raises(KeyError):
+            phys.get_physics_factory('q2', 'flat')
+    finally:
+        set_global_var('PHYSICS_FACTORIES', physics_factories)
+    assert phys.get_physics_factory('mass', 'cb') is DoubleCBFactory
+
+
 # pylint: disable=W0621
 def test_factory_load(factory):
     """Test factory loading returns an object of the correct type."""
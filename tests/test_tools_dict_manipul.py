@@ -3,8 +3,10 @@ import copy
 
 import ROOT
 import numpy as np
+import pytest
 
 from analysis.utils.config import recursive_dict_copy
+from analysis.utils.exceptions import ConfigError
 
 target1 = OrderedDict([('a', OrderedDict([('aa', {'aaa': 111, 'aab': OrderedDict(
         [('aaba', 1121), ('aabb', ROOT.RooRealVar('name1', 'title1', 3))])})])),
@@ -23,3 +25,21 @@ def test_recursive_dict_copy():
     assert test_odict1['b']['ba'] is target1['b']['ba']
     assert test_odict1['a']['aa']['aab']['aabb'] is target1['a']['aa']['aab']['aabb']
     assert isinstance(test_odict1['a']['aa']['aab'], OrderedDict)
+
+
+def test_recursive_dict_copy_cyclic():
+    cyclic_dict = OrderedDict([('a', {'aa': 1})])
+    cyclic_dict['a']['ab'] = cyclic_dict
+    with pytest.raises(ConfigError):
+        recursive_dict_copy(x=cyclic_dict)
+    # A dictionary used in several places is not a cycle
+    shared_dict = {'ba': 1}
+    test_dict = recursive_dict_copy(x={'a': shared_dict, 'b': {'bb': shared_dict}})
+    assert test_dict['a'] == test_dict['b']['bb'] == shared_dict
+    assert test_dict['a'] is not shared_dict
+    # Deep, but not cyclic, dictionaries are copied
+    deep_dict = current_level = {}
+    for _ in range(100):
+        current_level['a'] = {}
+        current_level = current_level['a']
+    assert recursive_dict_copy(x=deep_dict) == deep_dict